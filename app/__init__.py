@@ -1,13 +1,26 @@
+import os
 from flask import Flask
-from .extensions import db, migrate
+from .extensions import db, migrate, init_engine
 from .blueprints import register_blueprints
+from .blueprints.utils.queries import init_query_counter
+from .metrics import init_metrics
+from .profiling import init_profiling
+
+def create_app(config_class=None):
+    # e.g. APP_CONFIG=app.config.ProdConfig gunicorn main:app
+    config_class = config_class or os.environ.get("APP_CONFIG", "app.config.DevConfig")
 
-def create_app(config_class="app.config.DevConfig"):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_class)
+    if not app.config.get("SECRET_KEY"):
+        raise RuntimeError("SECRET_KEY is not set; export SECRET_KEY before starting the app")
     
     db.init_app(app)
+    init_engine(app)
     migrate.init_app(app, db)
+    init_query_counter(app)
+    init_metrics(app)
+    init_profiling(app)
 
     register_blueprints(app)
 
@@ -0,0 +1,85 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from ...metrics import render
+from ...profiling import get_profile_store, summary
+from ..utils import get_current_user, is_admin
+
+admin_bp = Blueprint("admin", __name__)
+
+
+def _scraper_authorized() -> bool:
+    """Prometheus can't log in; METRICS_TOKEN lets it send `Authorization: Bearer <token>`."""
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def _admin_error():
+    """An error response unless the caller is an admin (or the metrics scraper)."""
+    if _scraper_authorized():
+        return None
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "login required"}), 401
+    if not is_admin(user):
+        return jsonify({"error": "admin only"}), 403
+    return None
+
+
+@admin_bp.get("/metrics")
+def metrics():
+    error = _admin_error()
+    if error:
+        return error
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+# ---------- request profiles (app/profiling.py) ----------
+@admin_bp.get("/admin/profiles")
+def profiles():
+    error = _admin_error()
+    if error:
+        return error
+    return jsonify({"items": [summary(p) for p in reversed(get_profile_store().list())]})
+
+
+@admin_bp.get("/admin/profiles/<profile_id>")
+def profile_detail(profile_id):
+    error = _admin_error()
+    if error:
+        return error
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify({**summary(profile), "sql": profile["sql"]})
+
+
+@admin_bp.get("/admin/profiles/<profile_id>.collapsed")
+def profile_collapsed(profile_id):
+    error = _admin_error()
+    if error:
+        return error
+    profile = get_profile_store().get(profile_id)
+    if profile is None or profile["collapsed"] is None:
+        return jsonify({"error": "not found"}), 404
+    return Response(
+        profile["collapsed"], mimetype="text/plain",
+        headers={"Content-Disposition": f"attachment; filename=profile-{profile_id}.collapsed"},
+    )
+
+
+@admin_bp.get("/admin/profiles/<profile_id>.pstats")
+def profile_pstats(profile_id):
+    error = _admin_error()
+    if error:
+        return error
+    profile = get_profile_store().get(profile_id)
+    if profile is None or profile["pstats"] is None:
+        return jsonify({"error": "not found"}), 404
+    return Response(
+        profile["pstats"], mimetype="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename=profile-{profile_id}.pstats"},
+    )
@@ -1 +1,2 @@
-from .routes import auth_bp
\ No newline at end of file
+from .routes import auth_bp
+from . import cli
@@ -0,0 +1,75 @@
+import os
+import time
+from pathlib import Path
+
+import click
+
+from .roster import Checkpoint, count_records, import_batch, read_roster, roster_format, roster_hasher, validate
+from .routes import auth_bp
+
+
+@auth_bp.cli.command("import-roster")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None,
+              help="Defaults to jsonl for .jsonl/.ndjson/.json files, else csv.")
+@click.option("--batch-size", default=500, show_default=True, help="Rows per transaction.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Password hashing processes.")
+@click.option("--update-passwords", is_flag=True, help="Also reset passwords of accounts that already exist.")
+@click.option("--restart", is_flag=True, help="Ignore a saved checkpoint and start from the first record.")
+def import_roster_command(path, fmt, batch_size, workers, update_passwords, restart):
+    """Create or update user accounts from a CSV/JSONL roster, resuming after interruption."""
+    fmt = fmt or roster_format(path)
+    checkpoint = Checkpoint(path)
+    if restart:
+        checkpoint.clear()
+    try:
+        skip = checkpoint.load()
+    except ValueError as e:
+        raise click.ClickException(f"{e}; rerun with --restart")
+    if skip:
+        click.echo(f"resuming after {skip} records")
+
+    total = count_records(path, fmt)
+    hasher = roster_hasher(workers)
+    counts = {"created": 0, "updated": 0, "rejected": 0}
+    done = saved = skip
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        nonlocal saved
+        for k, n in import_batch(batch, hasher, update_passwords).items():
+            counts[k] += n
+        checkpoint.save(done)
+        saved = done
+        batch.clear()
+        rate = (done - skip) / max(time.perf_counter() - started, 1e-9)
+        click.echo(
+            f"{done}/{total} records  {counts['created']} created, {counts['updated']} updated, "
+            f"{counts['rejected']} rejected  {rate:.0f} rows/s"
+        )
+
+    try:
+        for position, (lineno, record) in enumerate(read_roster(path, fmt), 1):
+            if position <= skip:
+                continue
+            row = validate(record)
+            if isinstance(row, str):
+                counts["rejected"] += 1
+                click.echo(f"line {lineno}: {row}", err=True)
+            else:
+                batch.append(row)
+            done = position
+            if len(batch) >= batch_size:
+                flush()
+        if done > saved:
+            flush()
+    finally:
+        hasher.close()
+
+    checkpoint.clear()
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"imported {done - skip} records in {elapsed:.1f}s: {counts['created']} created, "
+        f"{counts['updated']} updated, {counts['rejected']} rejected"
+    )
@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...extensions import db
+from ...models.admin import Admin
+from ...models.user import User
+from ...passwords import HashingService, get_hashing_service
+from ..utils import is_valid_password
+
+# Roster records (CSV header or JSONL keys): account, name, password, and
+# optionally display_name (defaults to name) and admin (1/true/yes).
+SUPER_ADMIN = "O100734809"
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+def _insert(table):
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def roster_format(path: Path) -> str:
+    return "jsonl" if path.suffix.lower() in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def read_roster(path: Path, fmt: str):
+    """Yields (line number, record dict); unparseable JSONL lines yield (line, None)."""
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield lineno, record if isinstance(record, dict) else None
+
+
+def count_records(path: Path, fmt: str) -> int:
+    """Cheap upper bound for progress output (data lines, minus the CSV header)."""
+    with path.open("rb") as f:
+        lines = sum(1 for line in f if line.strip())
+    return max(0, lines - 1) if fmt == "csv" else lines
+
+
+def validate(record):
+    """A cleaned row dict, or an error string. Same rules as register_post."""
+    if record is None:
+        return "unparseable record"
+    account = str(record.get("account") or "").strip()
+    name = str(record.get("name") or "").strip()
+    display_name = str(record.get("display_name") or "").strip() or name[:16]
+    password = str(record.get("password") or "")
+    if not account or len(account) > 16:
+        return "account must be 1-16 characters"
+    if len(name) < 2:
+        return "name must be at least 2 characters"
+    if len(display_name) < 2 or len(display_name) > 16:
+        return "display_name must be 2-16 characters"
+    if len(password) < 4 or len(password) > 20 or not is_valid_password(password):
+        return "password must be 4-20 characters of letters, digits, '-' and '_'"
+    admin = str(record.get("admin") or "").strip().lower() in TRUE_VALUES or account == SUPER_ADMIN
+    return {"account": account, "name": name[:64], "display_name": display_name, "password": password, "admin": admin}
+
+
+class Checkpoint:
+    """
+    Number of roster records already committed, kept next to the roster as
+    <file>.progress and tied to its size and mtime. Upserts are idempotent,
+    so resuming just skips that many records.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path.with_name(path.name + ".progress")
+        stat = path.stat()
+        self.fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self) -> int:
+        """Records to skip; raises ValueError if the roster changed since the checkpoint."""
+        if not self.path.exists():
+            return 0
+        state = json.loads(self.path.read_text())
+        if state["fingerprint"] != self.fingerprint:
+            raise ValueError(f"{self.path} belongs to a different version of the roster")
+        return state["records"]
+
+    def save(self, records: int):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"fingerprint": self.fingerprint, "records": records}))
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def import_batch(rows, hasher: HashingService, update_passwords: bool = False) -> dict:
+    """
+    Upserts one batch of validated rows in a single transaction. New accounts
+    get hashed passwords; existing ones have name/display_name refreshed and
+    keep their password unless `update_passwords`. Returns counts.
+    """
+    rows = list({r["account"]: r for r in rows}.values())   # last occurrence wins within a batch
+    if not rows:
+        return {"created": 0, "updated": 0}
+    existing = set(db.session.execute(
+        select(User.account).where(User.account.in_([r["account"] for r in rows]))
+    ).scalars())
+    to_hash = [r for r in rows if update_passwords or r["account"] not in existing]
+    for r, password_hash in zip(to_hash, hasher.hash_many([r["password"] for r in to_hash])):
+        r["password_hash"] = password_hash
+
+    new_rows = [r for r in rows if r["account"] not in existing]
+    if new_rows:
+        db.session.execute(
+            _insert(User.__table__).on_conflict_do_nothing(index_elements=["account"]),
+            [{k: r[k] for k in ("account", "name", "display_name", "password_hash")} for r in new_rows],
+        )
+
+    old_rows = [r for r in rows if r["account"] in existing]
+    if old_rows:
+        stmt = _insert(User.__table__)
+        updated = ["name", "display_name"] + (["password_hash"] if update_passwords else [])
+        keys = ["account"] + updated
+        if not update_passwords:
+            # an INSERT that always conflicts, so the required column only needs a placeholder
+            keys.append("password_hash")
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["account"], set_={k: stmt.excluded[k] for k in updated},
+            ),
+            [{k: r.get(k, "") for k in keys} for r in old_rows],
+        )
+
+    admins = [{"account": r["account"]} for r in rows if r["admin"]]
+    if admins:
+        db.session.execute(_insert(Admin.__table__).on_conflict_do_nothing(), admins)
+    db.session.commit()
+    return {"created": len(new_rows), "updated": len(old_rows)}
+
+
+def roster_hasher(workers: int) -> HashingService:
+    """The configured hasher on a pool sized for a bulk import, not for request traffic."""
+    return HashingService(get_hashing_service().hasher, workers=workers)
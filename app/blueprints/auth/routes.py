@@ -3,8 +3,10 @@ from datetime import timedelta
 from ...extensions import db
 from ...models.user import User
 from ...models.admin import Admin
+from ...passwords import HashingBusy
+from .roster import SUPER_ADMIN
 
-from ..utils import get_current_user, is_valid_password
+from ..utils import get_current_user, invalidate_user, is_valid_password
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -26,10 +28,19 @@ def login_post():
         return render_template("login.html"), 400
 
     user = User.query.get(account)
-    if not user or not user.check_password(password):
-        print(user, password)
-        flash("帳號或密碼錯誤。", "error")
-        return render_template("login.html"), 401
+    try:
+        if not user or not user.check_password(password):
+            flash("帳號或密碼錯誤。", "error")
+            return render_template("login.html"), 401
+
+        # upgrade hashes made with older work factors while we have the password
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+            invalidate_user(account)
+    except HashingBusy:
+        flash("系統忙碌中，請稍後再試。", "error")
+        return render_template("login.html"), 503
 
     session["account"] = account
     session.permanent = False
@@ -56,8 +67,6 @@ def register_post():
     confirm = request.form.get("confirm","")
     display_name = request.form.get("display_name", "")
     
-    print(request.form)
-    
     if not name or len(name) < 2:
         flash("姓名至少需 2 個字。", "error")
         return render_template("register.html"), 400
@@ -79,14 +88,18 @@ def register_post():
 
     user = User(account=account, name=name, display_name=display_name)
         
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except HashingBusy:
+        flash("系統忙碌中，請稍後再試。", "error")
+        return render_template("register.html"), 503
     db.session.add(user)
     db.session.commit()
     
-    SUPER_ADMIN = "O100734809"
     if not Admin.query.get(SUPER_ADMIN):
         db.session.add(Admin(account=SUPER_ADMIN))
         db.session.commit()
+        invalidate_user(SUPER_ADMIN)
         
     return redirect(url_for("auth.login_get"))
 
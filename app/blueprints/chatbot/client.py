@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+
+import httpx
+from openai import APIConnectionError, APITimeoutError, InternalServerError, OpenAI, RateLimitError
+
+from ..utils.cache import TTLCache
+
+RETRYABLE = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+class LLMUnavailable(Exception):
+    """The request was not sent upstream; the caller should retry later."""
+
+
+class LLMRateLimited(LLMUnavailable):
+    pass
+
+
+class LLMBusy(LLMUnavailable):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, timer=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._timer = timer
+        self._updated = timer()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, n: float = 1) -> bool:
+        with self._lock:
+            now = self._timer()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+
+    def refund(self, n: float = 1):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + n)
+
+
+class LLMClient:
+    """
+    Wraps the OpenAI-compatible client with:
+      - a bounded, keep-alive HTTP connection pool and explicit timeouts
+      - token buckets per process and per user, checked before queueing
+      - at most `max_concurrency` upstream calls at once; others wait up
+        to `queue_timeout` seconds for a slot, then get LLMBusy
+      - exponential backoff with full jitter on 429/5xx/connection errors,
+        honouring Retry-After when the upstream sends one
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_connections: int = 20,
+        max_concurrency: int = 16,
+        queue_timeout: float = 10.0,
+        request_timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        global_rate: float = 20.0,
+        global_burst: float = 40.0,
+        user_rate: float = 0.5,
+        user_burst: float = 5.0,
+    ):
+        self._http = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(request_timeout, connect=5.0),
+        )
+        # retries are ours, so the SDK must not add its own on top
+        self._openai = OpenAI(
+            api_key=api_key, base_url=base_url, http_client=self._http,
+            max_retries=0, timeout=request_timeout,
+        )
+
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._global_bucket = TokenBucket(global_rate, global_burst)
+        self._user_rate = user_rate
+        self._user_burst = user_burst
+        self._user_buckets = TTLCache(maxsize=10000, ttl=3600)
+        self._bucket_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.queue_timeouts = 0
+
+    # ---------- admission ----------
+    def _user_bucket(self, user: str) -> TokenBucket:
+        with self._bucket_lock:
+            bucket = self._user_buckets.get(user)
+            if bucket is None:
+                bucket = TokenBucket(self._user_rate, self._user_burst)
+                self._user_buckets.set(user, bucket)
+            return bucket
+
+    def admit(self, user: str = None):
+        """Takes one token from the process bucket and the user's; raises LLMRateLimited."""
+        if not self._global_bucket.try_acquire():
+            self._count("rate_limited")
+            raise LLMRateLimited()
+        if user is not None and not self._user_bucket(user).try_acquire():
+            self._global_bucket.refund()
+            self._count("rate_limited")
+            raise LLMRateLimited()
+
+    def _acquire_slot(self):
+        self._count("waiting", 1)
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                self._count("queue_timeouts")
+                raise LLMBusy()
+        finally:
+            self._count("waiting", -1)
+        self._count("in_flight", 1)
+
+    def _release_slot(self):
+        self._count("in_flight", -1)
+        self._slots.release()
+
+    # ---------- calls ----------
+    def create(self, **params):
+        """Non-streaming chat completion. Call admit() first."""
+        self._acquire_slot()
+        try:
+            return self._with_retries(lambda: self._openai.chat.completions.create(**params))
+        finally:
+            self._release_slot()
+
+    def stream(self, **params):
+        """
+        Streaming chat completion; yields chunks. The concurrency slot is
+        taken when iteration starts and held until the stream ends. Only
+        opening the stream is retried, never a partially relayed one.
+        """
+        self._acquire_slot()
+        try:
+            stream = self._with_retries(
+                lambda: self._openai.chat.completions.create(stream=True, **params)
+            )
+            try:
+                yield from stream
+            finally:
+                stream.close()
+        finally:
+            self._release_slot()
+
+    def _with_retries(self, call):
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                return call()
+            except RETRYABLE as exc:
+                if attempt >= self.max_retries:
+                    self._count("errors")
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt, exc))
+                attempt += 1
+
+    def _backoff(self, attempt: int, exc) -> float:
+        response = getattr(exc, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # ---------- metrics ----------
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "saturation": self.in_flight / self.max_concurrency,
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "queue_timeouts": self.queue_timeouts,
+        }
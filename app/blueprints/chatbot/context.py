@@ -0,0 +1,192 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import update
+
+from ...extensions import db
+from ...models.chat import Conversation
+from . import store
+from .client import LLMUnavailable
+from .llm import LLM_SECONDS, get_client, record_usage
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a student and a "
+    "school assistant. Merge the new turns into the existing summary. Keep names, "
+    "facts, decisions and open questions; drop pleasantries. Reply with the "
+    "summary only, in the language of the conversation."
+)
+
+# per-message framing the upstream adds around the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_inflight = set()
+_inflight_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap upper-ish estimate without a tokenizer: ~3 UTF-8 bytes per token,
+    which overcounts English a little and is about right for CJK.
+    """
+    return len(text.encode("utf-8")) // 3 + MESSAGE_OVERHEAD_TOKENS
+
+
+def _turns(messages, after_id: int):
+    """(id, message) for non-empty messages newer than `after_id`, oldest first."""
+    return [
+        (int(m["id"]), m) for m in messages
+        if int(m["id"]) > after_id and m["content"]
+    ]
+
+
+def build_context(conv: Conversation):
+    """
+    Chat history to send ahead of a new prompt: the rolling summary (as a
+    system message) plus the most recent unsummarized turns that fit in
+    LLM_CONTEXT_TOKENS. Older turns are left to the summarizer, so the
+    payload stays bounded however long the conversation runs.
+    """
+    if conv is None:
+        return []
+    budget = current_app.config.get("LLM_CONTEXT_TOKENS", 1500)
+
+    context = []
+    if conv.summary:
+        context.append({"role": "system", "content": "Summary of the earlier conversation:\n" + conv.summary})
+        budget -= estimate_tokens(context[0]["content"])
+
+    recent = []
+    window = store.load_unsummarized(conv, _max_messages(), newest=True)
+    for _, m in reversed(_turns(window, conv.summary_upto)):
+        budget -= estimate_tokens(m["content"])
+        if budget < 0:
+            break
+        recent.append({"role": m["role"], "content": m["content"]})
+    recent.reverse()
+    return context + recent
+
+
+def _max_messages() -> int:
+    return current_app.config.get("LLM_CONTEXT_MAX_MESSAGES", 100)
+
+
+def _oldest_turns(conv: Conversation):
+    """
+    (turns, budget) for _pick_for_summary from the oldest unsummarized
+    messages. A full page means the backlog is at least that long, so it
+    is folded in whatever its token count.
+    """
+    config = current_app.config
+    budget = config.get("LLM_CONTEXT_TOKENS", 1500) - config.get("LLM_SUMMARY_MAX_TOKENS", 200)
+    limit = _max_messages()
+    turns = _turns(store.load_unsummarized(conv, limit), conv.summary_upto)
+    return turns, (budget if len(turns) < limit else 0)
+
+
+def _pick_for_summary(turns, budget: int):
+    """
+    Returns the id up to which turns should be folded into the summary, or
+    None. Summarizing starts once the unsummarized turns no longer fit in
+    `budget` and continues until the rest fit in half of it, so it runs
+    every few exchanges instead of every one.
+    """
+    total = sum(estimate_tokens(m["content"]) for _, m in turns)
+    if total <= budget:
+        return None
+    upto = None
+    for msg_id, m in turns:
+        if total <= budget // 2:
+            break
+        total -= estimate_tokens(m["content"])
+        upto = msg_id
+    return upto
+
+
+def summarize(conv_id: str) -> bool:
+    """
+    Folds turns that have fallen out of the context window into the
+    conversation's summary. The UPDATE is conditional on the conversation's
+    version being unchanged, so neither a concurrent summarizer nor a
+    /ai/clear that ran during the LLM call is overwritten.
+    """
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None:
+        return False
+    config = current_app.config
+    turns, budget = _oldest_turns(conv)
+    upto = _pick_for_summary(turns, budget)
+    if upto is None:
+        return False
+
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for msg_id, m in turns if msg_id <= upto)
+    client = get_client()
+    client.admit()
+    started = time.perf_counter()
+    response = client.create(
+        model=config["LLM_MODEL"],
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"Existing summary:\n{conv.summary or '(none)'}\n\nNew turns:\n{transcript}"},
+        ],
+        max_tokens=config.get("LLM_SUMMARY_MAX_TOKENS", 200),
+        temperature=0.2,
+    )
+    LLM_SECONDS.observe(time.perf_counter() - started, mode="summary")
+    record_usage(getattr(response, "usage", None))
+    summary = response.choices[0].message.content.strip()
+    if not summary:
+        return False
+
+    db.session.execute(
+        update(Conversation)
+        .where(
+            Conversation.id == conv.id,
+            Conversation.version == conv.version,
+            Conversation.summary_upto == conv.summary_upto,
+        )
+        .values(summary=summary, summary_upto=upto)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return True
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("LLM_SUMMARY_WORKERS", 2),
+                thread_name_prefix="chat-summary",
+            )
+    return _executor
+
+
+def _summarize_in_background(app, conv_id: str):
+    try:
+        with app.app_context():
+            summarize(conv_id)
+    except LLMUnavailable:
+        pass    # upstream saturated; the next exchange tries again
+    except Exception:
+        with app.app_context():
+            current_app.logger.exception("summarizing conversation %s failed", conv_id)
+    finally:
+        with _inflight_lock:
+            _inflight.discard(conv_id)
+
+
+def maybe_summarize(conv: Conversation):
+    """Schedules summarize() off the request path when the window has overflowed."""
+    if _pick_for_summary(*_oldest_turns(conv)) is None:
+        return
+    app = current_app._get_current_object()
+    with _inflight_lock:
+        if conv.id in _inflight:
+            return
+        _inflight.add(conv.id)
+    _get_executor(app).submit(_summarize_in_background, app, conv.id)
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+
+from ...metrics import Counter, Histogram, collector, register_cache
+from ..utils.cache import TTLCache
+from .client import LLMClient
+
+SYSTEM_PROMPT = "You are a helpful assistant for a school e platform. Keep answers concise, but keep a helpful/joyful tone."
+
+_client_lock = threading.Lock()
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+LLM_SECONDS = Histogram(
+    "schoolplus_llm_request_seconds",
+    "Chat completion latency, including waiting for a client slot and retries.",
+    ["mode"], buckets=LLM_BUCKETS,
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "schoolplus_llm_first_token_seconds", "Time to the first streamed token.", buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "schoolplus_llm_tokens_total",
+    "Tokens per upstream usage reports; streams without one count a token per delta.",
+    ["kind"],
+)
+
+
+def get_client() -> LLMClient:
+    """One pooled, rate-limited client per app, built from LLM_* config."""
+    app = current_app._get_current_object()
+    client = app.extensions.get("llm_client")
+    if client is not None:
+        return client
+    with _client_lock:
+        client = app.extensions.get("llm_client")
+        if client is None:
+            config = app.config
+            client = app.extensions["llm_client"] = LLMClient(
+                api_key=config["LLM_API_KEY"],
+                base_url=config["LLM_BASE_URL"],
+                max_connections=config.get("LLM_MAX_CONNECTIONS", 20),
+                max_concurrency=config.get("LLM_MAX_CONCURRENCY", 16),
+                queue_timeout=config.get("LLM_QUEUE_TIMEOUT", 10.0),
+                request_timeout=config.get("LLM_REQUEST_TIMEOUT", 30.0),
+                max_retries=config.get("LLM_MAX_RETRIES", 3),
+                backoff_base=config.get("LLM_BACKOFF_BASE", 0.5),
+                backoff_max=config.get("LLM_BACKOFF_MAX", 8.0),
+                global_rate=config.get("LLM_GLOBAL_RATE", 20.0),
+                global_burst=config.get("LLM_GLOBAL_BURST", 40.0),
+                user_rate=config.get("LLM_USER_RATE", 0.5),
+                user_burst=config.get("LLM_USER_BURST", 5.0),
+            )
+    return client
+
+
+class ResponseCache(TTLCache):
+    """Completion cache; `bypassed` counts requests too random to cache."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bypassed = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed, "size": len(self)}
+
+
+@collector
+def _client_samples():
+    client = current_app.extensions.get("llm_client")
+    if client is None:
+        return
+    m = client.metrics()
+    for name in ("in_flight", "waiting", "saturation"):
+        yield f"schoolplus_llm_client_{name}", "gauge", f"LLM client {name.replace('_', ' ')}.", {}, m[name]
+    for name in ("requests", "retries", "errors", "rate_limited", "queue_timeouts"):
+        yield f"schoolplus_llm_client_{name}_total", "counter", f"LLM client {name.replace('_', ' ')}.", {}, m[name]
+
+
+def record_usage(usage):
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+
+
+def get_response_cache() -> ResponseCache:
+    app = current_app._get_current_object()
+    cache = app.extensions.get("llm_response_cache")
+    if cache is not None:
+        return cache
+    with _client_lock:
+        cache = app.extensions.get("llm_response_cache")
+        if cache is None:
+            cache = app.extensions["llm_response_cache"] = ResponseCache(
+                maxsize=app.config.get("LLM_CACHE_MAX_ENTRIES", 2048),
+                ttl=app.config.get("LLM_CACHE_TTL", 3600),
+            )
+    return cache
+
+
+register_cache("llm_response", lambda: current_app.extensions.get("llm_response_cache"))
+
+
+_PUNCT_TAIL = re.compile(r"[\s?!.。？！~～]+$")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Folds case, width and spacing so trivially different phrasings share a key."""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = _SPACES.sub(" ", text).strip()
+    return _PUNCT_TAIL.sub("", text)
+
+
+def cache_key(prompt: str, temperature: float, context=None):
+    """
+    None when the request should skip the cache (empty or high temperature).
+    Prior turns are part of the key as a digest, so a follow-up like "and
+    the second one?" only hits when the whole conversation so far matches;
+    in practice that means first turns are shared.
+    """
+    config = current_app.config
+    if not config.get("LLM_CACHE_ENABLED", True):
+        return None
+    normalized = normalize_prompt(prompt)
+    if not normalized or temperature > config.get("LLM_CACHE_MAX_TEMPERATURE", 0.8):
+        get_response_cache().bypassed += 1
+        return None
+    # 0.1-wide buckets: 0.68 and 0.72 share answers, 0.2 and 0.7 don't
+    bucket = round(temperature, 1)
+    digest = None
+    if context:
+        digest = hashlib.sha256(json.dumps(context, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return (config["LLM_MODEL"], config["LLM_MAX_TOKENS"], bucket, digest, normalized)
+
+
+def build_messages(prompt: str, context=None):
+    """`context` is prior history from context.build_context()."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        *(context or []),
+        {"role": "user", "content": prompt},
+    ]
+
+
+def ask_ai_chat(prompt: str, temperature=0.7, user: str = None, context=None) -> str:
+    """
+    Raises LLMRateLimited / LLMBusy before anything is sent upstream, and
+    the openai error if the upstream still fails after retries.
+    """
+    key = cache_key(prompt, temperature, context)
+    if key is not None:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            return cached
+
+    client = get_client()
+    client.admit(user)
+    started = time.perf_counter()
+    response = client.create(
+        model=current_app.config["LLM_MODEL"],
+        messages=build_messages(prompt, context),
+        max_tokens=current_app.config["LLM_MAX_TOKENS"],
+        temperature=temperature
+    )
+    LLM_SECONDS.observe(time.perf_counter() - started, mode="complete")
+    record_usage(getattr(response, "usage", None))
+    reply = response.choices[0].message.content.strip()
+
+    if key is not None and reply:
+        get_response_cache().set(key, reply)
+    return reply
+
+
+def stream_ai_chat(prompt: str, temperature=0.7, user: str = None, context=None):
+    """
+    Returns an iterator of completion text deltas. Rate limits are checked
+    here, eagerly, so callers can answer 429 before starting a response;
+    waiting for a concurrency slot happens once iteration begins.
+    """
+    key = cache_key(prompt, temperature, context)
+    if key is not None:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            return iter([cached])
+
+    client = get_client()
+    client.admit(user)
+    chunks = client.stream(
+        model=current_app.config["LLM_MODEL"],
+        messages=build_messages(prompt, context),
+        max_tokens=current_app.config["LLM_MAX_TOKENS"],
+        temperature=temperature,
+    )
+    return _relay(chunks, key)
+
+
+def _relay(chunks, key):
+    parts = []
+    usage = None
+    started = time.perf_counter()
+    for chunk in chunks:
+        usage = getattr(chunk, "usage", None) or usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            if not parts:
+                LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+            parts.append(chunk.choices[0].delta.content)
+            yield chunk.choices[0].delta.content
+    LLM_SECONDS.observe(time.perf_counter() - started, mode="stream")
+    if usage is not None:
+        record_usage(usage)
+    else:
+        LLM_TOKENS.inc(len(parts), kind="completion")
+
+    # only complete streams are cached; an exception above skips this
+    reply = "".join(parts).strip()
+    if key is not None and reply:
+        get_response_cache().set(key, reply)
@@ -1,44 +1,18 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
-from datetime import datetime
-from openai import OpenAI
+from flask import current_app, Blueprint, Response, render_template, request, jsonify, redirect, url_for, flash, stream_with_context
+import json
+
+from openai import OpenAIError
 
 from ..utils import get_current_user
+from .client import LLMBusy, LLMRateLimited
+from .context import build_context, maybe_summarize
+from .llm import ask_ai_chat, stream_ai_chat
+from . import store
 
 chatbot_bp = Blueprint("chatbot", __name__)
 
-# In-memory store: user_id -> { conv_id -> {title, messages} }
-USER_CONV = {}
-SEQ = 1
-
-client = OpenAI(
-    api_key="gsk...",   # ⚠️ Replace with your Groq API Key
-    base_url="https://api.groq.com/openai/v1"
-)
-
-def _format_ts():
-    return datetime.now().strftime("%Y-%m-%d %H:%M")
-
-def _next_id():
-    global SEQ
-    SEQ += 1
-    return str(SEQ)
-
-def _get_user_convs(user_id):
-    if user_id not in USER_CONV:
-        USER_CONV[user_id] = {}
-    return USER_CONV[user_id]
-
-def ask_ai_chat(prompt: str, temperature=0.7) -> str:
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant for a school e platform. Keep answers concise, but keep a helpful/joyful tone."},
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=100,
-        temperature=temperature
-    )
-    return response.choices[0].message.content.strip()
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
 
 @chatbot_bp.route("/ai", methods=["GET"])
 def chat():
@@ -47,31 +21,46 @@ def chat():
         flash("請先登入。", "error")
         return redirect(url_for("index.login"))
 
-    user_convs = _get_user_convs(user.account)
-
     chat_id = request.args.get("chat_id")
-    q = request.args.get("q", "").strip().lower()
+    q = request.args.get("q", "").strip()
 
-    conversations = []
-    for cid, c in user_convs.items():
-        if not q or q in c["title"].lower():
-            conversations.append({"id": cid, "title": c["title"]})
+    # only the first page is rendered; the sidebar fetches more on demand
+    conversations, next_cursor = store.list_conversations(user.account, q)
 
     # pick a default conversation if none selected
     if not chat_id and conversations:
         chat_id = conversations[0]["id"]
 
-    messages = user_convs.get(chat_id, {}).get("messages", []) if chat_id else []
+    conv = store.get_conversation(user.account, chat_id)
+    messages = store.load_messages(conv) if conv else []
 
     return render_template(
         "chatbot.html",
         user=user,
-        conversations=sorted(conversations, key=lambda x: x["id"], reverse=True),
+        conversations=conversations,
+        next_cursor=next_cursor,
+        q=q,
         messages=messages,
         chat_id=chat_id,
     )
 
 
+@chatbot_bp.route("/ai/conversations", methods=["GET"])
+def list_conversations():
+    """JSON page of the sidebar: ?q=<terms>&cursor=<next_cursor>."""
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "unauthorized"}), 401
+
+    items, next_cursor = store.list_conversations(
+        user.account,
+        request.args.get("q", "").strip(),
+        cursor=request.args.get("cursor") or None,
+        per_page=request.args.get("per_page", 20, type=int),
+    )
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+
 @chatbot_bp.route("/ai/new", methods=["GET"])
 def new_chat():
     user = get_current_user()
@@ -79,10 +68,8 @@ def new_chat():
         flash("請先登入。", "danger")
         return redirect(url_for("index.login"))
 
-    user_convs = _get_user_convs(user.account)
-    chat_id = _next_id()
-    user_convs[chat_id] = {"title": "New Conversation", "messages": []}
-    return redirect(url_for("chatbot.chat", chat_id=chat_id))
+    conv = store.create_conversation(user.account)
+    return redirect(url_for("chatbot.chat", chat_id=conv.id))
 
 @chatbot_bp.route("/ai/send", methods=["POST"])
 def send_message():
@@ -91,39 +78,108 @@ def send_message():
         return jsonify({"error": "unauthorized"}), 401
 
     data = request.get_json(force=True)
-    chat_id = data.get("chat_id") or _next_id()
+    message, temperature = _parse_message(data)
+    conv = store.get_conversation(user.account, data.get("chat_id"))
+
+    try:
+        reply_text = ask_ai_chat(
+            message, temperature=temperature, user=user.account, context=build_context(conv),
+        )
+    except LLMRateLimited:
+        return jsonify({"error": "rate limited"}), 429
+    except LLMBusy:
+        return jsonify({"error": "busy"}), 503
+    except OpenAIError:
+        current_app.logger.exception("chat completion failed")
+        return jsonify({"error": "upstream error"}), 502
+
+    chat_id, conv, user_msg = _start_exchange(user, conv, message)
+    ai_msg = store.add_message(conv, "assistant", reply_text)
+    maybe_summarize(conv)
+
+    return jsonify({"chat_id": chat_id, "messages": [user_msg, ai_msg]})
+
+@chatbot_bp.route("/ai/stream", methods=["POST"])
+def stream_message():
+    """
+    Same as /ai/send, but relays the reply as Server-Sent Events:
+    a "start" event with the saved user message, one "delta" event per
+    token chunk, then "done" with the final assistant message. The reply is
+    saved once the stream ends, also when the client disconnects or the
+    upstream fails part-way; a reply with no text is not saved, and the
+    client gets an "error" event instead of "done".
+    Rate-limited requests get a plain 429 and nothing is saved.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "unauthorized"}), 401
+
+    data = request.get_json(force=True)
+    message, temperature = _parse_message(data)
+    conv = store.get_conversation(user.account, data.get("chat_id"))
+
+    try:
+        deltas = stream_ai_chat(
+            message, temperature=temperature, user=user.account, context=build_context(conv),
+        )
+    except LLMRateLimited:
+        return jsonify({"error": "rate limited"}), 429
+
+    chat_id, conv, user_msg = _start_exchange(user, conv, message)
+
+    def events():
+        chunks = []
+        error = None
+        ai_msg = None
+        try:
+            yield _sse({"type": "start", "chat_id": chat_id, "message": user_msg})
+            try:
+                for delta in deltas:
+                    chunks.append(delta)
+                    yield _sse({"type": "delta", "content": delta})
+            except LLMBusy:
+                error = "busy"
+            except Exception:
+                current_app.logger.exception("chat stream failed")
+                error = "upstream error"
+        finally:
+            # also reached on GeneratorExit when the client goes away
+            if hasattr(deltas, "close"):
+                deltas.close()
+            reply = "".join(chunks).strip()
+            if reply:
+                ai_msg = store.add_message(conv, "assistant", reply)
+                maybe_summarize(conv)
+        if error or ai_msg is None:
+            yield _sse({"type": "error", "error": error or "empty reply"})
+        if ai_msg is not None:
+            yield _sse({"type": "done", "message": ai_msg})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _parse_message(data):
     message = (data.get("message") or "").strip()
-    model = data.get("model") or "gpt-4o-mini"
     temperature = float(data.get("temperature") or 0.7)
+    return message, temperature
 
-    user_convs = _get_user_convs(user.account)
-    if chat_id not in user_convs:
-        user_convs[chat_id] = {"title": message[:40] or "Conversation", "messages": []}
+def _start_exchange(user, conv, message):
+    """Saves the user's message; returns (chat_id, conversation, user_msg)."""
+    # unknown or foreign ids get a fresh conversation rather than the client's id
+    if conv is None:
+        conv = store.create_conversation(user.account, message[:40] or "Conversation")
+
+    title = None
+    if conv.title == "New Conversation":
+        title = message[:40] or "Conversation"
 
     # Save user message
-    user_msg = {
-        "id": _next_id(),
-        "role": "user",
-        "content": message,
-        "timestamp": _format_ts()
-    }
-    user_convs[chat_id]["messages"].append(user_msg)
-
-    if user_convs[chat_id]["title"] == "New Conversation":
-        user_convs[chat_id]["title"] = message[:40] or "Conversation"
-
-    # --- AI reply (stub). Replace with actual LLM API call.
-    reply_text = ask_ai_chat(message, temperature=temperature)
-    
-    ai_msg = {
-        "id": _next_id(),
-        "role": "assistant",
-        "content": reply_text,
-        "timestamp": _format_ts()
-    }
-    user_convs[chat_id]["messages"].append(ai_msg)
+    user_msg = store.add_message(conv, "user", message, title=title)
 
-    return jsonify({"chat_id": chat_id, "messages": [user_msg, ai_msg]})
+    return conv.id, conv, user_msg
 
 @chatbot_bp.route("/ai/clear", methods=["POST"])
 def clear_chat():
@@ -134,8 +190,8 @@ def clear_chat():
     data = request.get_json(force=True)
     chat_id = data.get("chat_id")
 
-    user_convs = _get_user_convs(user.account)
-    if chat_id in user_convs:
-        user_convs[chat_id]["messages"] = []
+    conv = store.get_conversation(user.account, chat_id)
+    if conv:
+        store.clear_messages(conv)
 
     return jsonify({"ok": True})
@@ -0,0 +1,50 @@
+from sqlalchemy import and_, column, exists, func, literal_column, or_, select, table
+
+from ...extensions import db
+from ...models.chat import ChatMessage, Conversation
+
+# Handle on the FTS5 table; kept out of db.metadata like forum/search.py's.
+chat_messages_fts = table("chat_messages_fts", column("rowid"), column("content"))
+
+# The trigram tokenizer can only match terms of at least three characters.
+FTS_MIN_TOKEN = 3
+
+
+def tokenize(qstr: str):
+    return [t for t in (qstr or "").lower().split() if t]
+
+
+def _content_match(tokens):
+    """Conversation ids with a message containing every token."""
+    fts_tokens = [t for t in tokens if len(t) >= FTS_MIN_TOKEN]
+    short = [t for t in tokens if len(t) < FTS_MIN_TOKEN]
+
+    if db.engine.dialect.name != "sqlite" or not fts_tokens:
+        return exists().where(
+            ChatMessage.conversation_id == Conversation.id,
+            *[func.lower(ChatMessage.content).contains(t, autoescape=True) for t in tokens],
+        )
+
+    expr = " AND ".join('"{}"'.format(t.replace('"', '""')) for t in fts_tokens)
+    matched = (
+        select(ChatMessage.conversation_id)
+        .join(chat_messages_fts, chat_messages_fts.c.rowid == ChatMessage.id)
+        .where(literal_column("chat_messages_fts").op("MATCH")(expr))
+        .where(*[func.lower(ChatMessage.content).contains(t, autoescape=True) for t in short])
+    )
+    return Conversation.id.in_(matched)
+
+
+def text_filter(q, qstr: str):
+    """
+    Restricts a query over the user's conversations to those whose title,
+    or any message, contains every term of `qstr`. Message text goes through
+    the FTS index; titles are matched directly, which is cheap because the
+    outer query is already narrowed to one user's rows by
+    ix_conversations_user_updated.
+    """
+    tokens = tokenize(qstr)
+    if not tokens:
+        return q
+    title_match = and_(*[func.lower(Conversation.title).contains(t, autoescape=True) for t in tokens])
+    return q.filter(or_(title_match, _content_match(tokens)))
@@ -0,0 +1,241 @@
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import String, and_, func, or_, type_coerce, update
+
+from ...extensions import db
+from ...metrics import register_cache
+from ...models.chat import ChatMessage, Conversation
+from .search import text_filter
+
+# rough per-message overhead on top of the text itself
+MESSAGE_OVERHEAD = 200
+
+
+def _message_size(m: dict) -> int:
+    return MESSAGE_OVERHEAD + len(m["content"].encode("utf-8"))
+
+
+class ConversationCache:
+    """
+    LRU of conversation message lists, bounded by approximate memory both
+    globally and per user. Entries are tagged with Conversation.version and
+    only served while the row still has that version, so writes made by
+    other workers or nodes are never masked.
+    """
+
+    def __init__(self, max_bytes: int, user_max_bytes: int):
+        self.max_bytes = max_bytes
+        self.user_max_bytes = user_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()     # conv_id -> (account, version, messages, size)
+        self._user_bytes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, conv_id: str, version: int):
+        with self._lock:
+            entry = self._entries.get(conv_id)
+            if entry is None or entry[1] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(conv_id)
+            self.hits += 1
+            return list(entry[2])
+
+    def put(self, conv_id: str, account: str, version: int, messages):
+        size = sum(_message_size(m) for m in messages)
+        with self._lock:
+            self._remove(conv_id)
+            if size > self.user_max_bytes:
+                return
+            self._entries[conv_id] = (account, version, list(messages), size)
+            self._bytes += size
+            self._user_bytes[account] = self._user_bytes.get(account, 0) + size
+            self._evict(account)
+
+    def append(self, conv_id: str, old_version: int, new_version: int, message: dict):
+        """Extends a cached entry in place if it was current, else drops it."""
+        with self._lock:
+            entry = self._entries.get(conv_id)
+            if entry is None:
+                return
+            account, version, messages, size = entry
+            if version != old_version:
+                self._remove(conv_id)
+                return
+            self._remove(conv_id)
+        self.put(conv_id, account, new_version, messages + [message])
+
+    def discard(self, conv_id: str):
+        with self._lock:
+            self._remove(conv_id)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, conv_id):
+        entry = self._entries.pop(conv_id, None)
+        if entry is None:
+            return
+        account, _, _, size = entry
+        self._bytes -= size
+        self._user_bytes[account] -= size
+        if not self._user_bytes[account]:
+            del self._user_bytes[account]
+
+    def _evict(self, account):
+        # the user's own least-recently-used conversations go first
+        if self._user_bytes.get(account, 0) > self.user_max_bytes:
+            for conv_id in [k for k, e in self._entries.items() if e[0] == account]:
+                if self._user_bytes.get(account, 0) <= self.user_max_bytes:
+                    break
+                self._remove(conv_id)
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ConversationCache:
+    app = current_app._get_current_object()
+    cache = app.extensions.get("chat_cache")
+    if cache is not None:
+        return cache
+    with _cache_lock:
+        cache = app.extensions.get("chat_cache")
+        if cache is None:
+            cache = app.extensions["chat_cache"] = ConversationCache(
+                max_bytes=app.config.get("CHAT_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+                user_max_bytes=app.config.get("CHAT_CACHE_USER_MAX_BYTES", 1024 * 1024),
+            )
+    return cache
+
+
+register_cache("chat_conversations", lambda: current_app.extensions.get("chat_cache"))
+
+
+def message_to_dict(m: ChatMessage) -> dict:
+    return {
+        "id": str(m.id),
+        "role": m.role,
+        "content": m.content,
+        "timestamp": m.created_at.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+# updated_at compared as the stored text, so a cursor round-trips exactly
+_updated_key = type_coerce(Conversation.updated_at, String)
+
+
+def list_conversations(account: str, q: str = "", cursor: str = None, per_page: int = 20):
+    """
+    One page of the user's conversations, most recently updated first,
+    optionally filtered by search terms. Returns (items, next_cursor); the
+    cursor is "<updated_at>|<id>" of the last item, so every page costs the
+    same however many conversations the user has.
+    """
+    per_page = max(1, min(per_page, 100))
+    query = Conversation.query.filter(Conversation.user_account == account)
+    query = text_filter(query, q)
+
+    if cursor:
+        updated, _, conv_id = cursor.rpartition("|")
+        query = query.filter(or_(
+            _updated_key < updated,
+            and_(_updated_key == updated, Conversation.id < conv_id),
+        ))
+
+    rows = (
+        query.order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .with_entities(Conversation.id, Conversation.title, _updated_key.label("updated"))
+        .limit(per_page + 1)
+        .all()
+    )
+    items = [{"id": r.id, "title": r.title} for r in rows[:per_page]]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_cursor = f"{last.updated}|{last.id}"
+    return items, next_cursor
+
+
+def get_conversation(account: str, conv_id: str):
+    if not conv_id:
+        return None
+    conv = db.session.get(Conversation, conv_id)
+    if conv is None or conv.user_account != account:
+        return None
+    return conv
+
+
+def create_conversation(account: str, title: str = "New Conversation") -> Conversation:
+    conv = Conversation(user_account=account, title=title)
+    db.session.add(conv)
+    db.session.commit()
+    return conv
+
+
+def load_messages(conv: Conversation):
+    cache = get_cache()
+    messages = cache.get(conv.id, conv.version)
+    if messages is None:
+        rows = ChatMessage.query.filter(ChatMessage.conversation_id == conv.id).order_by(ChatMessage.id)
+        messages = [message_to_dict(m) for m in rows]
+        cache.put(conv.id, conv.user_account, conv.version, messages)
+    return messages
+
+
+def load_unsummarized(conv: Conversation, limit: int, newest: bool = False):
+    """
+    Non-empty messages after conv.summary_upto, oldest first: the first
+    `limit` of them, or with `newest` the last `limit`. A range scan of the
+    (conversation_id, id) index, so the cost doesn't grow with the chat.
+    """
+    query = ChatMessage.query.filter(
+        ChatMessage.conversation_id == conv.id,
+        ChatMessage.id > conv.summary_upto,
+        ChatMessage.content != "",
+    )
+    rows = query.order_by(ChatMessage.id.desc() if newest else ChatMessage.id).limit(limit).all()
+    if newest:
+        rows.reverse()
+    return [message_to_dict(m) for m in rows]
+
+
+def _bump(conv: Conversation, **values) -> int:
+    return db.session.execute(
+        update(Conversation)
+        .where(Conversation.id == conv.id)
+        .values(version=Conversation.version + 1, updated_at=func.now(), **values)
+        .returning(Conversation.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def add_message(conv: Conversation, role: str, content: str, title: str = None) -> dict:
+    old_version = conv.version
+    msg = ChatMessage(conversation_id=conv.id, role=role, content=content)
+    db.session.add(msg)
+    db.session.flush()
+    new_version = _bump(conv, **({"title": title} if title else {}))
+    data = message_to_dict(msg)
+    db.session.commit()
+
+    get_cache().append(conv.id, old_version, new_version, data)
+    return data
+
+
+def clear_messages(conv: Conversation):
+    ChatMessage.query.filter(ChatMessage.conversation_id == conv.id).delete(synchronize_session=False)
+    # the summary describes the deleted messages; drop it in the same statement
+    _bump(conv, summary=None, summary_upto=0)
+    db.session.commit()
+    get_cache().discard(conv.id)
@@ -0,0 +1,69 @@
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...extensions import db
+from ...models.issue import Issue
+from ...models.label import Label, issue_labels
+
+
+def _insert(table):
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def normalize_label(s: str):
+    return (s or "").strip().lower()[:64]
+
+
+def attach_labels(issue_id: int, names):
+    """
+    Links the labels `names` to an issue, creating any that are new, and
+    bumps issue_count for each link actually added. The caller commits.
+    """
+    names = sorted({normalize_label(n) for n in names} - {""})
+    if not names:
+        return []
+
+    db.session.execute(
+        _insert(Label).values([{"name": n} for n in names])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    added = db.session.execute(
+        _insert(issue_labels)
+        .from_select(["issue_id", "label_id"], select(literal(issue_id), Label.id).where(Label.name.in_(names)))
+        .on_conflict_do_nothing()
+        .returning(issue_labels.c.label_id)
+    ).scalars().all()
+    if added:
+        db.session.execute(
+            update(Label).where(Label.id.in_(added)).values(issue_count=Label.issue_count + 1)
+        )
+    return names
+
+
+def label_filter(names, mode: str = "any"):
+    """
+    WHERE clause for issues carrying any (or, with mode="all", every) one of
+    `names`. Resolved through the labels.name unique index and the
+    (label_id, issue_id) index, never by scanning issues.
+    """
+    names = {normalize_label(n) for n in names} - {""}
+    matching = (
+        select(issue_labels.c.issue_id)
+        .join(Label, Label.id == issue_labels.c.label_id)
+        .where(Label.name.in_(names))
+    )
+    if mode == "all" and len(names) > 1:
+        matching = matching.group_by(issue_labels.c.issue_id).having(func.count() == len(names))
+    return Issue.id.in_(matching)
+
+
+def label_counts(limit: int = None):
+    """[{"name", "count"}], most used first, from the maintained counters."""
+    q = select(Label.name, Label.issue_count).where(Label.issue_count > 0).order_by(
+        Label.issue_count.desc(), Label.name
+    )
+    if limit:
+        q = q.limit(limit)
+    return [{"name": name, "count": count} for name, count in db.session.execute(q)]
@@ -0,0 +1,191 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import Integer, cast, func, select
+
+from ...extensions import db
+from ...models.issue import Issue
+from ...models.vote import IssueVote
+
+
+BUCKET = 3600   # seconds; votes are aggregated per issue per hour
+
+
+def _bucket(column):
+    """Hour bucket number (unix time // BUCKET) of a timestamp column."""
+    if db.engine.dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer) // BUCKET
+    return cast(func.floor(func.extract("epoch", column) / BUCKET), Integer)
+
+
+class Leaderboard:
+    """
+    Per-process cache of the most-upvoted issues ("top") and of the issues
+    with the most recent upvote activity ("hot").
+
+    "top" is the first `size` rows of the (upvote, id) index. "hot" weighs
+    each vote by 2 ** ((cast_at - epoch) / half_life), so a vote counts half
+    as much as one cast `half_life` seconds later. Ordering by that sum does
+    not depend on the current time, so scores never need re-decaying.
+
+    Both lists are rebuilt from the database every `ttl` seconds, which is
+    how votes cast in other processes show up. "hot" is loaded as vote
+    counts per issue per hour within `window` (GROUP BY in SQL, weighted at
+    the middle of the hour), so a reload reads one row per active issue-hour
+    rather than one per vote. With `app`, reloads after the first run on a
+    background thread and readers keep the previous lists meanwhile. Votes
+    cast in this process are applied immediately via `record_vote`, so
+    reads never sort the issues table.
+    """
+
+    def __init__(self, size=20, ttl=60.0, half_life=6 * 3600.0, window=7 * 86400.0, timer=time.time,
+                 app=None):
+        self.app = app
+        self.size = size
+        self.ttl = ttl
+        self.half_life = half_life
+        self.window = window
+        self._timer = timer
+
+        self._lock = threading.Lock()
+        self._loading = False
+        self._loaded = False
+        self._expires = 0.0
+        self._epoch = timer() - window
+        self._top = []          # [(upvote, issue_id)], best first
+        self._hot = {}          # issue_id -> decayed vote weight
+        self._hot_ranked = None
+
+    # ---------- reads ----------
+    def top(self, n: int = None):
+        """[(issue_id, upvote)] for the `n` most-upvoted issues."""
+        self._maybe_reload()
+        with self._lock:
+            return [(issue_id, upvote) for upvote, issue_id in self._top[:n or self.size]]
+
+    def hot(self, n: int = None):
+        """[issue_id] ranked by time-decayed upvotes."""
+        self._maybe_reload()
+        with self._lock:
+            if self._hot_ranked is None:
+                self._hot_ranked = [
+                    issue_id for issue_id, _ in
+                    heapq.nlargest(self.size, self._hot.items(), key=lambda kv: (kv[1], kv[0]))
+                ]
+            return self._hot_ranked[:n or self.size]
+
+    # ---------- writes ----------
+    def record_vote(self, issue_id: int, upvote: int, when: float = None):
+        """Applies a vote cast in this process; `upvote` is the issue's new count."""
+        when = self._timer() if when is None else when
+        with self._lock:
+            self._place(issue_id, upvote)
+            self._hot[issue_id] = self._hot.get(issue_id, 0.0) + self._weight(when)
+            self._hot_ranked = None
+
+    def record_issue(self, issue_id: int):
+        """A new issue only matters while there are fewer than `size` issues."""
+        with self._lock:
+            if len(self._top) < self.size:
+                self._place(issue_id, 0)
+
+    def invalidate(self):
+        with self._lock:
+            self._expires = 0.0
+
+    def _place(self, issue_id, upvote):
+        top = [e for e in self._top if e[1] != issue_id]
+        if len(top) >= self.size and (upvote, issue_id) <= top[-1]:
+            self._top = top
+            return
+        top.append((upvote, issue_id))
+        top.sort(reverse=True)
+        self._top = top[:self.size]
+
+    def _weight(self, when: float) -> float:
+        return 2.0 ** ((when - self._epoch) / self.half_life)
+
+    # ---------- reload ----------
+    def _maybe_reload(self):
+        now = self._timer()
+        with self._lock:
+            if now < self._expires or (self._loading and self._loaded):
+                return
+            self._loading = True
+            background = self._loaded and self.app is not None
+        if background:
+            threading.Thread(target=self._reload_in_background, args=(now,), name="leaderboard", daemon=True).start()
+            return
+        try:
+            self._reload(now)
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _reload_in_background(self, now: float):
+        try:
+            with self.app.app_context():
+                self._reload(now)
+        except Exception:
+            with self.app.app_context():
+                current_app.logger.exception("leaderboard reload failed")
+            with self._lock:
+                self._expires = now + self.ttl    # keep serving the old lists; retry next period
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _reload(self, now: float):
+        top = [
+            (upvote, issue_id) for issue_id, upvote in db.session.execute(
+                select(Issue.id, Issue.upvote)
+                .order_by(Issue.upvote.desc(), Issue.id.desc())
+                .limit(self.size)
+            )
+        ]
+
+        since = datetime.fromtimestamp(now - self.window, timezone.utc)
+        if db.engine.dialect.name == "sqlite":
+            since = since.replace(tzinfo=None)    # stored as naive UTC
+        epoch = now - self.window
+        bucket = _bucket(IssueVote.create_date).label("bucket")
+        hot = {}
+        for issue_id, hour, votes in db.session.execute(
+            select(IssueVote.issue_id, bucket, func.count())
+            .where(IssueVote.create_date >= since)
+            .group_by(IssueVote.issue_id, bucket)
+        ):
+            weight = 2.0 ** ((hour * BUCKET + BUCKET / 2 - epoch) / self.half_life)
+            hot[issue_id] = hot.get(issue_id, 0.0) + votes * weight
+
+        with self._lock:
+            self._top = top
+            self._hot = hot
+            self._hot_ranked = None
+            self._epoch = epoch
+            self._expires = now + self.ttl
+            self._loaded = True
+
+
+_create_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    app = current_app._get_current_object()
+    board = app.extensions.get("issue_leaderboard")
+    if board is not None:
+        return board
+    with _create_lock:
+        board = app.extensions.get("issue_leaderboard")
+        if board is None:
+            board = app.extensions["issue_leaderboard"] = Leaderboard(
+                app=app,
+                size=app.config.get("LEADERBOARD_SIZE", 20),
+                ttl=app.config.get("LEADERBOARD_TTL", 60.0),
+                half_life=app.config.get("LEADERBOARD_HOT_HALF_LIFE", 6 * 3600.0),
+                window=app.config.get("LEADERBOARD_HOT_WINDOW", 7 * 86400.0),
+            )
+    return board
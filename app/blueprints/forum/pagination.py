@@ -0,0 +1,111 @@
+from flask import request
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+
+from ...models.comment import Comment
+from ...models.issue import Issue
+from ...models.user import User
+
+
+class KeysetPage:
+    """
+    One page of a keyset (cursor) walk over issues, newest first.
+    Exposes the subset of Flask-SQLAlchemy's Pagination the templates use.
+    """
+
+    page = None
+
+    def __init__(self, items, per_page, next_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def to_dict(self):
+        data = {
+            "per_page": self.per_page,
+            "next_cursor": self.next_cursor,
+            "has_next": self.has_next,
+        }
+        if self.total is not None:
+            data["total"] = self.total
+        return data
+
+
+def wants_keyset() -> bool:
+    """Cursor mode is opt-in: any `cursor` / `before_id` param, even empty."""
+    return "cursor" in request.args or "before_id" in request.args
+
+
+def request_cursor():
+    raw = request.args.get("cursor") or request.args.get("before_id")
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def keyset_paginate(q, before_id=None, per_page=20, with_total=False):
+    """
+    Fetches the page of `q` strictly after `before_id` in `Issue.id DESC`
+    order. Reads per_page + 1 rows to detect a next page, so the cost is
+    O(per_page) at any depth; COUNT(*) only runs when `with_total` is set.
+    """
+    per_page = max(1, min(per_page, 100))
+    total = q.order_by(None).count() if with_total else None
+
+    if before_id is not None:
+        q = q.filter(Issue.id < before_id)
+    rows = q.order_by(Issue.id.desc()).limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    next_cursor = items[-1].id if len(rows) > per_page else None
+    return KeysetPage(items, per_page, next_cursor, total)
+
+
+COMMENT_SORTS = ("oldest", "newest", "top")
+
+
+def _comment_cursor(c: Comment, sort: str) -> str:
+    return f"{c.upvote}.{c.id}" if sort == "top" else str(c.id)
+
+
+def comment_page(issue_id: int, cursor: str = None, per_page: int = 20, sort: str = "oldest"):
+    """
+    One page of an issue's comments and the cursor for the next, or None.
+    "oldest"/"newest" walk the (issue_id, id) index; "top" walks
+    (issue_id, upvote, id) with an "upvote.id" cursor, so a comment whose
+    votes change between pages may be seen twice or skipped.
+    """
+    per_page = max(1, min(per_page, 100))
+    if sort not in COMMENT_SORTS:
+        sort = "oldest"
+
+    q = Comment.query.filter(Comment.issue_id == issue_id).options(
+        joinedload(Comment.author).load_only(User.account, User.display_name)
+    )
+    try:
+        if sort == "top":
+            if cursor:
+                upvote, last_id = (int(p) for p in cursor.split(".", 1))
+                q = q.filter(tuple_(Comment.upvote, Comment.id) < tuple_(upvote, last_id))
+            q = q.order_by(Comment.upvote.desc(), Comment.id.desc())
+        elif sort == "newest":
+            if cursor:
+                q = q.filter(Comment.id < int(cursor))
+            q = q.order_by(Comment.id.desc())
+        else:
+            if cursor:
+                q = q.filter(Comment.id > int(cursor))
+            q = q.order_by(Comment.id)
+    except ValueError:
+        return comment_page(issue_id, None, per_page, sort)
+
+    rows = q.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = _comment_cursor(items[-1], sort) if len(rows) > per_page else None
+    return items, next_cursor
@@ -1,10 +1,20 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify
+from flask import Blueprint, abort, request, render_template, redirect, url_for, flash, jsonify
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
 from ...extensions import db
 from ...models.issue import Issue
 from ...models.comment import Comment
 from ...models.user import User
 from ..utils import get_current_user
-from sqlalchemy import or_, func
+from ..utils.conditional import make_etag, not_modified, set_validators
+from ..utils.queries import query_budget
+from .search import text_filter
+from .pagination import KeysetPage, comment_page, keyset_paginate, request_cursor, wants_keyset
+from .labels import attach_labels, label_counts, label_filter, normalize_label
+from .leaderboard import get_leaderboard
+from .versions import issue_touch_values, list_changed, list_state
+from .votes import DuplicateVote, cast_comment_vote, cast_issue_vote
+from .serializers import comment_to_dict, issue_card, issue_detail, with_card_options, with_detail_options
 
 forum_bp = Blueprint("forum", __name__)
 
@@ -20,10 +30,14 @@ def forum_home():
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
 
-    query = Issue.query.order_by(Issue.id.desc())
+    issues = Issue.query.options(selectinload(Issue.labels))
+    if wants_keyset():
+        pagination = keyset_paginate(issues, request_cursor(), per_page)
+    else:
+        query = issues.order_by(Issue.id.desc())
 
-    # keep the same pagination style you already use in /api/search
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # keep the same pagination style you already use in /api/search
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     # pass both the items and the pagination object into the template
     return render_template(
         "forum.html",
@@ -42,17 +56,18 @@ def forum_issue(issue_id: int):
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
 
-    query = Issue.query.order_by(Issue.id.desc())
+    query = Issue.query.options(selectinload(Issue.labels)).order_by(Issue.id.desc())
     # keep the same pagination style you already use in /api/search
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     issue = Issue.query.get_or_404(issue_id)
-    
-    print(issue)
+    comments, comments_next = comment_page(issue_id)
     
     return render_template(
         "forum.html",
         user=user, 
         issue=issue,
+        comments=[comment_to_dict(c) for c in comments],
+        comments_next=comments_next,
         pagination=pagination
     )
 
@@ -61,9 +76,6 @@ def split_csv(csv: str):
         return []
     return [p.strip() for p in csv.split(",") if p.strip()]
 
-def normalize_label(s: str):
-    return (s or "").strip().lower()
-
 # ---------- Create Issue ----------
 @forum_bp.post("/forum/issues")
 def forum_create_issue():
@@ -88,10 +100,15 @@ def forum_create_issue():
         flash("請輸入類別.", "error")
         return redirect(url_for("forum.forum_home"))
 
-    issue = Issue(author_id=user.account, title=title, body=body, label=label)
+    names = [normalize_label(n) for n in split_csv(label)]
+    issue = Issue(author_id=user.account, title=title, body=body, label=names[0] if names else None)
 
     db.session.add(issue)
+    db.session.flush()
+    attach_labels(issue.id, names)
+    list_changed()
     db.session.commit()
+    get_leaderboard().record_issue(issue.id)
     
     flash("成功發布Issue", "success")
     
@@ -114,6 +131,10 @@ def forum_add_comment(issue_id: int):
 
     c = Comment(author_id=user.account, issue_id=issue_id, body=body)
     db.session.add(c)
+    db.session.execute(
+        update(Issue).where(Issue.id == issue_id)
+        .values(comment_count=Issue.comment_count + 1, **issue_touch_values())
+    )
     db.session.commit()
     
     flash("成功發布回復。", "success")
@@ -121,71 +142,148 @@ def forum_add_comment(issue_id: int):
 
 # ---------- Card list API (for the grid of cards) ----------
 @forum_bp.get("/forum/api/issues")
+@query_budget(5)
 def api_list_issues():
     """
     Returns only what the cards need.
     Query params: page (default 1), per_page (default 20), label=category(optional)
+    Polls with a matching If-None-Match get a 304 after one validator lookup.
     """
     user = get_current_user()
     if not user:
         flash("請先登入。")
         return redirect(url_for("index.login"))
 
+    generation, touched_at, changed_at = list_state()
+    etag = make_etag("issues", generation, touched_at)
+    unchanged = not_modified(etag, changed_at)
+    if unchanged is not None:
+        return unchanged
+
     page     = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 20, type=int)
     label    = normalize_label(request.args.get("label"))
 
-    q = Issue.query
+    q = with_card_options(Issue.query)
     if label:
-        q = q.filter(Issue.labels.any(Issue.label == label))
+        q = q.filter(label_filter([label]))
+
+    if wants_keyset():
+        pagination = keyset_paginate(
+            q, request_cursor(), per_page,
+            with_total=request.args.get("with_total", 0, type=int) == 1,
+        )
+    else:
+        q = q.order_by(Issue.id.desc())
+        pagination = q.paginate(page=page, per_page=per_page, error_out=False)
+
+    items = [issue_card(i) for i in pagination.items]
+
+    if isinstance(pagination, KeysetPage):
+        data = {"items": items, **pagination.to_dict()}
+    else:
+        data = {
+            "items": items,
+            "page": pagination.page,
+            "per_page": pagination.per_page,
+            "total": pagination.total,
+            "pages": pagination.pages
+        }
+    return set_validators(jsonify(data), etag, changed_at)
+
+# ---------- Leaderboard: most-upvoted / hot issues ----------
+@forum_bp.get("/forum/api/issues/top")
+@query_budget(4)
+def api_top_issues():
+    """
+    Query params: sort=top|hot (default top), limit (default and max LEADERBOARD_SIZE)
+    Served from the per-process leaderboard; only its periodic reload
+    touches issues/issue_votes beyond the one card lookup.
+    """
+    user = get_current_user()
+    if not user:
+        flash("請先登入。")
+        return redirect(url_for("index.login"))
 
-    q = q.order_by(Issue.id.desc())
-    pagination = q.paginate(page=page, per_page=per_page, error_out=False)
+    sort  = (request.args.get("sort") or "top").lower()
+    limit = request.args.get("limit", type=int)
 
-    items = [{
-        "id": i.id,
-        "title": i.title,
-        "author_name": i.author_name,
-        "labels": [l.name for l in i.labels],
-        "upvote": i.upvote,
-    } for i in pagination.items]
+    board = get_leaderboard()
+    if sort == "hot":
+        ids = board.hot(limit)
+    elif sort == "top":
+        ids = [issue_id for issue_id, _ in board.top(limit)]
+    else:
+        return jsonify({"error": "sort must be top or hot"}), 400
 
-    return jsonify({
-        "items": items,
-        "page": pagination.page,
-        "per_page": pagination.per_page,
-        "total": pagination.total,
-        "pages": pagination.pages
-    })
+    found = {i.id: i for i in with_card_options(Issue.query).filter(Issue.id.in_(ids))} if ids else {}
+    return jsonify({"sort": sort, "items": [issue_card(found[i]) for i in ids if i in found]})
+
+# ---------- Label facets ----------
+@forum_bp.get("/forum/api/labels")
+@query_budget(2)
+def api_list_labels():
+    user = get_current_user()
+    if not user:
+        flash("請先登入。")
+        return redirect(url_for("index.login"))
+
+    return jsonify(label_counts(request.args.get("limit", type=int)))
 
 # ---------- Issue detail API (for the 70% modal) ----------
 @forum_bp.get("/forum/api/issues/<int:issue_id>")
+@query_budget(4)
 def api_get_issue(issue_id: int):
+    """Polls with a matching If-None-Match get a 304 after one primary-key lookup."""
     user = get_current_user()
     if not user:
         flash("請先登入。")
         return redirect(url_for("index.login"))
 
-    i = Issue.query.get_or_404(issue_id)
-    data = {
-        "id": i.id,
-        "title": i.title,
-        "body": i.body,
-        "author_id": i.author_id,
-        "author_name": i.author_name,
-        "labels": [l.name for l in i.labels],
-        "upvote": i.upvote,
-        "comments": [{
-            "id": c.id,
-            "author_id": c.author_id,
-            "body": c.body,
-            "upvote": c.upvote
-        } for c in i.comments]
-    }
-    return jsonify(data)
+    state = db.session.execute(
+        select(Issue.version, Issue.updated_at).where(Issue.id == issue_id)
+    ).first()
+    if state is None:
+        abort(404)
+    unchanged = not_modified(make_etag("issue", issue_id, state.version), state.updated_at)
+    if unchanged is not None:
+        return unchanged
+
+    i = with_detail_options(Issue.query).filter(Issue.id == issue_id).first_or_404()
+    comments, next_cursor = comment_page(issue_id, per_page=request.args.get("comments_per_page", 20, type=int))
+    return set_validators(
+        jsonify(issue_detail(i, comments, next_cursor)),
+        make_etag("issue", issue_id, i.version), i.updated_at,
+    )
+
+# ---------- Comment pages (cursor from the detail's comments_next_cursor) ----------
+@forum_bp.get("/forum/api/issues/<int:issue_id>/comments")
+@query_budget(2)
+def api_list_comments(issue_id: int):
+    """
+    Query params: cursor (optional), per_page (default 20, max 100),
+    sort=oldest|newest|top (default oldest)
+    """
+    user = get_current_user()
+    if not user:
+        flash("請先登入。")
+        return redirect(url_for("index.login"))
+
+    comments, next_cursor = comment_page(
+        issue_id,
+        cursor=request.args.get("cursor") or None,
+        per_page=request.args.get("per_page", 20, type=int),
+        sort=(request.args.get("sort") or "oldest").lower(),
+    )
+    return jsonify({
+        "items": [comment_to_dict(c) for c in comments],
+        "next_cursor": next_cursor,
+        "has_next": next_cursor is not None,
+    })
 
 # ---------- Search (title tokens + labels) ----------
 @forum_bp.get("/forum/api/search")
+@query_budget(4)
 def api_search_issues():
     user = get_current_user()
     if not user:
@@ -195,33 +293,38 @@ def api_search_issues():
     qstr       = (request.args.get("q") or "").strip()
     label_csv  = (request.args.get("labels") or "").strip()
     label_mode = (request.args.get("label_mode") or "any").lower()
+    sort       = (request.args.get("sort") or "newest").lower()
     page       = request.args.get("page", 1, type=int)
     per_page   = request.args.get("per_page", 20, type=int)
 
-    q = Issue.query
+    q = with_card_options(Issue.query)
 
-    if qstr:
-        tokens = [t for t in qstr.lower().split() if t]
-        if tokens:
-            like_clauses = [func.lower(Issue.title).like(f"%{t}%") for t in tokens]
-            q = q.filter(or_(*like_clauses))
+    q, rank = text_filter(q, qstr, rank=(sort == "relevance"))
 
-    names = [normalize_label(n) for n in split_csv(label_csv)]
+    names = split_csv(label_csv)
     if names:
-        if label_mode == "all":
-            for name in names:
-                q = q.filter(Issue.label == name)
-        else:
-            q = q.filter(Issue.label.in_(names))
-
-    q = q.order_by(Issue.id.desc())
-    pagination = q.paginate(page=page, per_page=per_page, error_out=False)
+        q = q.filter(label_filter(names, label_mode))
+
+    # relevance order has no stable keyset, so it always uses page numbers
+    if wants_keyset() and rank is None:
+        pagination = keyset_paginate(
+            q, request_cursor(), per_page,
+            with_total=request.args.get("with_total", 0, type=int) == 1,
+        )
+    elif rank is not None:
+        q = q.order_by(rank, Issue.id.desc())
+        pagination = q.paginate(page=page, per_page=per_page, error_out=False)
+    else:
+        q = q.order_by(Issue.id.desc())
+        pagination = q.paginate(page=page, per_page=per_page, error_out=False)
+
+    items = [issue_card(i) for i in pagination.items]
+
+    if isinstance(pagination, KeysetPage):
+        return jsonify({"items": items, **pagination.to_dict()})
 
     return jsonify({
-        "items": [{
-            "id": i.id, "title": i.title, "author_name": i.author_name,
-            "labels": [l.name for l in i.labels], "upvote": i.upvote
-        } for i in pagination.items],
+        "items": items,
         "page": pagination.page, "per_page": pagination.per_page,
         "total": pagination.total, "pages": pagination.pages
     })
@@ -234,15 +337,27 @@ def api_issue_upvote(issue_id: int):
         flash("請先登入。")
         return redirect(url_for("index.login"))
 
-    issue = Issue.query.get_or_404(issue_id)
-    issue.upvote = (issue.upvote or 0) + 1
+    try:
+        upvote, received = cast_issue_vote(user.account, issue_id)
+    except DuplicateVote:
+        return jsonify({"error": "already voted"}), 409
 
-    # also increment the author's total upvotes_received
-    if issue.author:  # relationship to User
-        issue.author.upvotes_received = (issue.author.upvotes_received or 0) + 1
+    return jsonify({"id": issue_id, "upvote": upvote, "author_upvotes_received": received})
 
-    db.session.commit()
-    return jsonify({"id": issue.id, "upvote": issue.upvote, "author_upvotes_received": issue.author.upvotes_received if issue.author else None})
+# ---------- Upvote: comment + author tally ----------
+@forum_bp.post("/forum/api/comments/<int:comment_id>/upvote")
+def api_comment_upvote(comment_id: int):
+    user = get_current_user()
+    if not user:
+        flash("請先登入。")
+        return redirect(url_for("index.login"))
+
+    try:
+        upvote, received = cast_comment_vote(user.account, comment_id)
+    except DuplicateVote:
+        return jsonify({"error": "already voted"}), 409
+
+    return jsonify({"id": comment_id, "upvote": upvote, "author_upvotes_received": received})
 
 
 # from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify
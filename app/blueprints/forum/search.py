@@ -0,0 +1,63 @@
+from flask import current_app
+from sqlalchemy import column, func, literal_column, or_, table
+
+from ...extensions import db
+from ...models.issue import Issue
+
+# Lightweight handle on the FTS5 virtual table; deliberately not part of
+# db.metadata so create_all()/autogenerate never treat it as a plain table.
+issues_fts = table("issues_fts", column("rowid"), column("title"), column("body"))
+
+# The trigram tokenizer can only match terms of at least three characters.
+FTS_MIN_TOKEN = 3
+
+
+def tokenize(qstr: str):
+    return [t for t in (qstr or "").lower().split() if t]
+
+
+def fts_available() -> bool:
+    backend = current_app.config.get("FORUM_SEARCH_BACKEND", "fts")
+    return backend == "fts" and db.engine.dialect.name == "sqlite"
+
+
+def fts_match_expression(tokens):
+    """Builds an FTS5 query that ORs every token as a quoted substring."""
+    return " OR ".join('"{}"'.format(t.replace('"', '""')) for t in tokens)
+
+
+def like_filter(q, tokens):
+    like_clauses = [func.lower(Issue.title).like(f"%{t}%") for t in tokens]
+    return q.filter(or_(*like_clauses))
+
+
+def text_filter(q, qstr: str, rank: bool = False):
+    """
+    Restricts `q` to issues matching `qstr`. On the FTS path the index
+    matches any of the terms of three or more characters, and every
+    shorter term must also appear in the title or body.
+    Returns (query, rank_expr); rank_expr is a BM25 score (lower is better)
+    when the FTS index was used and `rank` is set, otherwise None.
+    """
+    tokens = tokenize(qstr)
+    if not tokens:
+        return q, None
+
+    fts_tokens = [t for t in tokens if len(t) >= FTS_MIN_TOKEN]
+    short = [t for t in tokens if len(t) < FTS_MIN_TOKEN]
+    if not fts_available() or not fts_tokens:
+        return like_filter(q, tokens), None
+
+    # terms the index can't see still have to appear, checked on the rows it matched
+    q = q.join(issues_fts, issues_fts.c.rowid == Issue.id).filter(
+        literal_column("issues_fts").op("MATCH")(fts_match_expression(fts_tokens)),
+        *[
+            or_(
+                func.lower(Issue.title).contains(t, autoescape=True),
+                func.lower(Issue.body).contains(t, autoescape=True),
+            )
+            for t in short
+        ],
+    )
+    rank_expr = func.bm25(literal_column("issues_fts")) if rank else None
+    return q, rank_expr
@@ -0,0 +1,68 @@
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from ...models.comment import Comment
+from ...models.issue import Issue
+from ...models.label import Label
+from ...models.user import User
+
+# Columns a card needs; everything else (notably `body`) stays in the DB.
+CARD_COLUMNS = (Issue.id, Issue.author_id, Issue.title, Issue.upvote, Issue.comment_count)
+AUTHOR_COLUMNS = (User.account, User.display_name)
+
+
+def with_card_options(q):
+    """Issue cards: card columns + author in one joined SELECT, labels in one more."""
+    return q.options(
+        load_only(*CARD_COLUMNS),
+        joinedload(Issue.author).load_only(*AUTHOR_COLUMNS),
+        selectinload(Issue.labels).load_only(Label.name),
+    )
+
+
+def with_detail_options(q):
+    """Issue detail: issue + author + labels joined. Comments are paged separately (comment_page)."""
+    return q.options(
+        joinedload(Issue.author).load_only(*AUTHOR_COLUMNS),
+        joinedload(Issue.labels).load_only(Label.name),
+    )
+
+
+def issue_labels(i: Issue):
+    return [l.name for l in i.labels]
+
+
+def issue_card(i: Issue) -> dict:
+    return {
+        "id": i.id,
+        "title": i.title,
+        "author_name": i.author.display_name if i.author else None,
+        "labels": issue_labels(i),
+        "upvote": i.upvote,
+        "comment_count": i.comment_count,
+    }
+
+
+def comment_to_dict(c: Comment) -> dict:
+    return {
+        "id": c.id,
+        "author_id": c.author_id,
+        "author_name": c.author.display_name if c.author else None,
+        "body": c.body,
+        "upvote": c.upvote,
+    }
+
+
+def issue_detail(i: Issue, comments=(), comments_next_cursor=None) -> dict:
+    """`comments` is the first page from comment_page; the rest is fetched by cursor."""
+    return {
+        "id": i.id,
+        "title": i.title,
+        "body": i.body,
+        "author_id": i.author_id,
+        "author_name": i.author.display_name if i.author else None,
+        "labels": issue_labels(i),
+        "upvote": i.upvote,
+        "comment_count": i.comment_count,
+        "comments": [comment_to_dict(c) for c in comments],
+        "comments_next_cursor": comments_next_cursor,
+    }
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+
+from ...extensions import db
+from ...models.generation import CacheGeneration
+from ...models.issue import Issue
+from ..utils.generations import bump_generation
+
+# Validators for the forum JSON APIs (utils/conditional.py). Each issue
+# carries a version bumped with everything its detail shows (comments,
+# votes on it or its comments) and an updated_at set at the same time.
+# The card lists are validated by max(issues.updated_at), one step down
+# the ix_issues_updated_at index, plus the "forum_issues" generation for
+# changes that don't touch an existing row (a new issue). Votes never
+# write a shared row.
+LIST_GENERATION = "forum_issues"
+
+
+def touch_time() -> datetime:
+    """
+    Microsecond timestamp for updated_at, so two writes in the same second
+    still move the list validator (CURRENT_TIMESTAMP has 1s resolution).
+    """
+    now = datetime.now(timezone.utc)
+    return now.replace(tzinfo=None) if db.engine.dialect.name == "sqlite" else now
+
+
+def issue_touch_values() -> dict:
+    """Extra SET clauses for an UPDATE that already targets the issue row."""
+    return {"version": Issue.version + 1, "updated_at": touch_time()}
+
+
+def touch_issues(ids):
+    """`ids` is a list of issue ids or a SELECT of them. The caller commits."""
+    db.session.execute(
+        update(Issue).where(Issue.id.in_(ids)).values(**issue_touch_values())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def list_changed():
+    bump_generation(LIST_GENERATION)
+
+
+def list_state():
+    """(generation, max issue updated_at, last modified) for the card lists, in one query."""
+    row = db.session.execute(select(
+        select(CacheGeneration.generation).where(CacheGeneration.name == LIST_GENERATION).scalar_subquery(),
+        select(CacheGeneration.updated_at).where(CacheGeneration.name == LIST_GENERATION).scalar_subquery(),
+        select(func.max(Issue.updated_at)).scalar_subquery(),
+    )).one()
+    generation, created_at, touched_at = row
+    stamps = [t for t in (created_at, touched_at) if t is not None]
+    return generation or 0, touched_at, (max(stamps, key=_utc) if stamps else None)
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
@@ -0,0 +1,380 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+from itertools import count
+from pathlib import Path
+
+from flask import abort, current_app
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+
+from ...extensions import db
+from ...models.comment import Comment
+from ...models.issue import Issue
+from ...models.user import User
+from ...models.vote import CommentVote, IssueVote
+from .versions import touch_issues, touch_time
+
+# kind -> (target model, vote model, vote column pointing at the target)
+KINDS = {
+    "issue": (Issue, IssueVote, "issue_id"),
+    "comment": (Comment, CommentVote, "comment_id"),
+}
+
+# keeps multi-row INSERTs well under SQLite's bound-parameter limit
+INSERT_CHUNK = 500
+
+
+class DuplicateVote(Exception):
+    pass
+
+
+def _insert(model):
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class VoteBuffer:
+    """
+    Write-behind buffer for upvotes. Votes are accepted in memory and
+    flushed by a background thread every `interval` seconds, or as soon as
+    `max_pending` votes are waiting. Each flush is one multi-row INSERT of
+    the vote rows plus one batched UPDATE per table.
+
+    Durability:
+      "memory"  pending votes are lost if the process dies
+      "journal" each vote is appended to a per-process journal file that a
+                later process replays on startup
+      "fsync"   as "journal", and the file is fsync'd per vote
+
+    Replaying a journal is idempotent. Vote rows are inserted with
+    ON CONFLICT DO NOTHING, and counters only grow for the rows the
+    INSERT's RETURNING reports as inserted, so stored counts stay exact.
+
+    Duplicates: cast() raises DuplicateVote (the endpoint's 409) when the
+    vote is pending in this process or already committed. Each gunicorn
+    worker has its own buffer, so the same vote sent through two workers
+    before either flushes is accepted by both, and both replies count it.
+    The reply counts are best-effort; the flush keeps one row and logs
+    the other as a duplicate.
+
+    Failed flushes:
+      OperationalError (locked or unreachable database) puts the batch back
+      and retries with exponential backoff, up to `max_retries` times in a
+      row; after that the batch is dead-lettered.
+      Anything else (a deleted issue or comment, a constraint violation)
+      means some row will never apply, so the batch is retried one vote per
+      transaction and only the votes that still fail are dead-lettered.
+    Dead-lettered votes go to dead.<pid>.jsonl in the journal directory
+    (or the log, without one) and are not replayed automatically.
+    """
+
+    def __init__(self, app, interval=1.0, max_pending=500, durability="journal", journal_dir=None,
+                 max_retries=5):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.durability = durability
+        self.journal_dir = Path(journal_dir) if journal_dir else None
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._seq = count()
+        self._failures = 0            # consecutive transient flush failures
+
+        self._pending = []            # (kind, account, target_id, author_id)
+        self._pending_files = []      # journal files covering self._pending
+        self._keys = set()            # (kind, account, target_id) not yet flushed
+        self._target_delta = Counter()
+        self._author_delta = Counter()
+        self._journal = None
+
+        if self.journal_dir and durability != "memory":
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            self._recover()
+
+        atexit.register(self.flush)
+
+    # ---------- accept ----------
+    def cast(self, kind: str, account: str, target_id: int):
+        """
+        Queues a vote and returns (upvote, author_upvotes_received) as the
+        voter should see them: the committed value plus this process's
+        unflushed votes. Duplicates pending in other processes aren't seen
+        here (see the class docstring).
+        """
+        model, vote_model, _ = KINDS[kind]
+        key = (kind, account, target_id)
+        self._ensure_thread()
+
+        with self._lock:
+            if key in self._keys:
+                raise DuplicateVote()
+        if db.session.get(vote_model, (account, target_id)) is not None:
+            raise DuplicateVote()
+
+        row = db.session.execute(
+            select(model.upvote, model.author_id).where(model.id == target_id)
+        ).first()
+        if row is None:
+            abort(404)
+        received = db.session.execute(
+            select(User.upvotes_received).where(User.account == row.author_id)
+        ).scalar() or 0
+
+        with self._lock:
+            if key in self._keys:
+                raise DuplicateVote()
+            entry = (kind, account, target_id, row.author_id)
+            self._write_journal(entry)
+            self._pending.append(entry)
+            self._keys.add(key)
+            self._target_delta[(kind, target_id)] += 1
+            self._author_delta[row.author_id] += 1
+
+            upvote = row.upvote + self._target_delta[(kind, target_id)]
+            received += self._author_delta[row.author_id]
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            self._wake.set()
+        return upvote, received
+
+    # ---------- flush ----------
+    def flush(self) -> int:
+        """Writes all pending votes; returns how many were taken from the buffer."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                files, self._pending_files = self._pending_files, []
+                if self._journal is not None:
+                    self._journal.close()
+                    self._journal = None
+            if not batch:
+                return 0
+
+            try:
+                with self.app.app_context():
+                    self._apply(batch)
+                    db.session.commit()
+                done, rest = batch, []
+            except OperationalError:
+                self._failures += 1
+                with self.app.app_context():
+                    current_app.logger.warning(
+                        "vote buffer flush failed (%d/%d)", self._failures, self.max_retries, exc_info=True
+                    )
+                if self._failures <= self.max_retries:
+                    self._requeue(batch, files)
+                    return 0
+                self._dead_letter(batch, f"database unavailable after {self.max_retries} retries")
+                done, rest = batch, []
+            except Exception:
+                with self.app.app_context():
+                    current_app.logger.exception("vote buffer flush failed; applying votes one by one")
+                done, rest = self._apply_each(batch)
+            self._failures = 0 if not rest else self._failures + 1
+
+            self._settle(done)
+            if rest:
+                # the journal files still cover `done`; replaying applied votes is a no-op
+                self._requeue(rest, files)
+            else:
+                for path in files:
+                    path.unlink(missing_ok=True)
+            return len(done)
+
+    def _apply_each(self, batch):
+        """
+        Applies votes one per transaction, dead-lettering those that fail.
+        Stops at a transient error; returns (handled, not yet attempted).
+        """
+        dead = []
+        with self.app.app_context():
+            for i, entry in enumerate(batch):
+                try:
+                    self._apply([entry])
+                    db.session.commit()
+                except OperationalError:
+                    db.session.rollback()
+                    self._dead_letter(dead)
+                    return batch[:i], batch[i:]
+                except Exception as e:
+                    db.session.rollback()
+                    dead.append((entry, repr(getattr(e, "orig", None) or e)))
+        self._dead_letter(dead)
+        return batch, []
+
+    def _dead_letter(self, entries, reason=None):
+        """`entries` are (entry, error) pairs, or plain entries sharing `reason`."""
+        if not entries:
+            return
+        if reason is not None:
+            entries = [(e, reason) for e in entries]
+        with self.app.app_context():
+            current_app.logger.error("vote buffer dropped %d vote(s) to the dead-letter journal", len(entries))
+            if self.journal_dir is None or self.durability == "memory":
+                for entry, error in entries:
+                    current_app.logger.error("dropped vote %s: %s", entry, error)
+                return
+        path = self.journal_dir / f"dead.{os.getpid()}.jsonl"
+        with open(path, "a", encoding="utf-8") as f:
+            for entry, error in entries:
+                f.write(json.dumps({"vote": entry, "error": error}) + "\n")
+
+    def _requeue(self, entries, files):
+        with self._lock:
+            self._pending[:0] = entries
+            self._pending_files[:0] = files
+
+    def _settle(self, entries):
+        """Forgets votes that no longer need flushing (written or dead-lettered)."""
+        with self._lock:
+            for kind, account, target_id, author_id in entries:
+                self._keys.discard((kind, account, target_id))
+                self._decrement(self._target_delta, (kind, target_id))
+                self._decrement(self._author_delta, author_id)
+
+    def _apply(self, batch):
+        authors = Counter()
+        for kind, (model, vote_model, fk) in KINDS.items():
+            entries = [e for e in batch if e[0] == kind]
+            if not entries:
+                continue
+
+            inserted = set()
+            for start in range(0, len(entries), INSERT_CHUNK):
+                rows = [{"user_account": a, fk: t} for _, a, t, _ in entries[start:start + INSERT_CHUNK]]
+                stmt = (
+                    _insert(vote_model).values(rows).on_conflict_do_nothing()
+                    .returning(vote_model.user_account, getattr(vote_model, fk))
+                )
+                inserted.update(tuple(r) for r in db.session.execute(stmt))
+
+            targets = Counter()
+            for _, account, target_id, author_id in entries:
+                if (account, target_id) in inserted:
+                    targets[target_id] += 1
+                    authors[author_id] += 1
+            if len(entries) > len(inserted):
+                # accepted by this process, but already stored by another
+                current_app.logger.info(
+                    "vote buffer: %d %s vote(s) were already recorded and are not counted",
+                    len(entries) - len(inserted), kind,
+                )
+            if targets:
+                table = model.__table__
+                values = {"upvote": table.c.upvote + bindparam("n")}
+                if model is Issue:
+                    values.update(version=table.c.version + 1, updated_at=touch_time())
+                db.session.connection().execute(
+                    update(table).where(table.c.id == bindparam("tid")).values(**values),
+                    [{"tid": t, "n": n} for t, n in targets.items()],
+                )
+                if model is Comment:
+                    touch_issues(select(Comment.issue_id).where(Comment.id.in_(list(targets))))
+
+        if authors:
+            table = User.__table__
+            db.session.connection().execute(
+                update(table).where(table.c.account == bindparam("acc"))
+                .values(upvotes_received=table.c.upvotes_received + bindparam("n")),
+                [{"acc": a, "n": n} for a, n in authors.items()],
+            )
+
+    @staticmethod
+    def _decrement(counter, key):
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+
+    # ---------- background thread ----------
+    def _ensure_thread(self):
+        # a forked worker inherits the object but not the thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+            if self._failures:
+                # back off; a full buffer must not turn into a loop of failing flushes
+                time.sleep(min(self.interval * 2 ** self._failures, 60.0))
+
+    # ---------- journal ----------
+    def _write_journal(self, entry):
+        if self.journal_dir is None or self.durability == "memory":
+            return
+        if self._journal is None:
+            path = self.journal_dir / f"votes.{os.getpid()}.{next(self._seq)}.jsonl"
+            self._journal = open(path, "a", encoding="utf-8")
+            self._pending_files.append(path)
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        if self.durability == "fsync":
+            os.fsync(self._journal.fileno())
+
+    def _recover(self):
+        """Adopts journals left behind by processes that are no longer running."""
+        for path in sorted(self.journal_dir.glob("votes.*.jsonl")):
+            pid = int(path.name.split(".")[1])
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            with open(path, encoding="utf-8") as f:
+                entries = [tuple(json.loads(line)) for line in f if line.strip()]
+            for kind, account, target_id, author_id in entries:
+                self._pending.append((kind, account, target_id, author_id))
+                self._keys.add((kind, account, target_id))
+                self._target_delta[(kind, target_id)] += 1
+                self._author_delta[author_id] += 1
+            self._pending_files.append(path)
+
+
+_create_lock = threading.Lock()
+
+
+def get_vote_buffer() -> VoteBuffer:
+    app = current_app._get_current_object()
+    buf = app.extensions.get("vote_buffer")
+    if buf is not None:
+        return buf
+    with _create_lock:
+        buf = app.extensions.get("vote_buffer")
+        if buf is None:
+            buf = app.extensions["vote_buffer"] = VoteBuffer(
+                app,
+                interval=app.config.get("VOTE_BUFFER_FLUSH_INTERVAL", 1.0),
+                max_pending=app.config.get("VOTE_BUFFER_MAX_PENDING", 500),
+                durability=app.config.get("VOTE_BUFFER_DURABILITY", "journal"),
+                journal_dir=app.config.get("VOTE_BUFFER_JOURNAL_DIR"),
+                max_retries=app.config.get("VOTE_BUFFER_MAX_RETRIES", 5),
+            )
+    return buf
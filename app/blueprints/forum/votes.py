@@ -0,0 +1,76 @@
+from flask import abort, current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from ...extensions import db
+from ...models.comment import Comment
+from ...models.issue import Issue
+from ...models.user import User
+from ...models.vote import CommentVote, IssueVote
+from .leaderboard import get_leaderboard
+from .versions import issue_touch_values, touch_issues
+from .vote_buffer import DuplicateVote, get_vote_buffer
+
+
+def _bump(model, target_id: int, amount: int = 1):
+    """UPDATE ... SET upvote = upvote + n RETURNING upvote, author_id."""
+    values = {"upvote": model.upvote + amount}
+    if model is Issue:
+        values.update(issue_touch_values())
+    return db.session.execute(
+        update(model)
+        .where(model.id == target_id)
+        .values(**values)
+        .returning(model.upvote, model.author_id)
+    ).first()
+
+
+def _bump_author(account: str, amount: int = 1):
+    return db.session.execute(
+        update(User)
+        .where(User.account == account)
+        .values(upvotes_received=User.upvotes_received + amount)
+        .returning(User.upvotes_received)
+    ).scalar()
+
+
+def _cast(vote, model, target_id: int):
+    """
+    Records `vote` and bumps the target and its author in one transaction.
+    The target is bumped first, so a missing one aborts with 404 before the
+    vote row is written; after that the only constraint the insert can
+    break is the vote's primary key (DuplicateVote).
+    Returns (upvote, author_upvotes_received).
+    """
+    row = _bump(model, target_id)
+    if row is None:
+        db.session.rollback()
+        abort(404)
+
+    try:
+        db.session.add(vote)
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        raise DuplicateVote()
+
+    received = _bump_author(row.author_id)
+    if model is Comment:
+        touch_issues(select(Comment.issue_id).where(Comment.id == target_id))
+    db.session.commit()
+    return row.upvote, received
+
+
+def cast_issue_vote(account: str, issue_id: int):
+    if current_app.config.get("VOTE_BUFFER_ENABLED"):
+        upvote, received = get_vote_buffer().cast("issue", account, issue_id)
+    else:
+        upvote, received = _cast(IssueVote(user_account=account, issue_id=issue_id), Issue, issue_id)
+    get_leaderboard().record_vote(issue_id, upvote)
+    return upvote, received
+
+
+def cast_comment_vote(account: str, comment_id: int):
+    if current_app.config.get("VOTE_BUFFER_ENABLED"):
+        return get_vote_buffer().cast("comment", account, comment_id)
+    return _cast(CommentVote(user_account=account, comment_id=comment_id), Comment, comment_id)
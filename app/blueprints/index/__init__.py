@@ -1 +1,2 @@
-from .routes import index_bp
\ No newline at end of file
+from .routes import index_bp
+from . import cli
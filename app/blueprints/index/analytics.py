@@ -0,0 +1,276 @@
+from sqlalchemy import bindparam, case, delete, func, insert, or_, select, true, tuple_, update
+
+from ...extensions import db
+from ...models.course import Course, CourseGradeStats, Enrollment, SemesterSummary
+
+# Grade analytics, computed set-at-a-time with SQL window functions and
+# stored in summary tables so pages read one precomputed row:
+#   course_grade_stats          per (course, semester) offering
+#   enrollments.class_percentile
+#   semester_summaries.*        per (student, semester) median, variance,
+#                               best/worst course, percentiles
+# Every refresh takes the set of offerings whose grades changed, so a single
+# grade edit touches only that class, its students and their cohort.
+
+BUCKETS = 10
+
+
+def _offerings(pairs):
+    if pairs is None:
+        return true()
+    return tuple_(Enrollment.course_code, Enrollment.semester).in_(list(pairs))
+
+
+def _moments(partition, where):
+    """n, mean, population variance, min, max and median of scores per partition."""
+    keys = [getattr(Enrollment, name) for name in partition]
+    ranked = (
+        select(
+            *keys,
+            Enrollment.score,
+            func.row_number().over(partition_by=keys, order_by=Enrollment.score).label("rn"),
+            func.count().over(partition_by=keys).label("n"),
+        )
+        .where(Enrollment.score.is_not(None), where)
+        .subquery()
+    )
+    score = ranked.c.score
+    middle = ranked.c.rn.between((ranked.c.n + 1) // 2, (ranked.c.n + 2) // 2)
+    return (
+        select(
+            *[ranked.c[name] for name in partition],
+            func.count().label("n"),
+            func.avg(score).label("mean"),
+            (func.avg(score * score) - func.avg(score) * func.avg(score)).label("variance"),
+            func.min(score).label("score_min"),
+            func.max(score).label("score_max"),
+            func.avg(case((middle, score))).label("median"),
+        )
+        .group_by(*[ranked.c[name] for name in partition])
+    )
+
+
+def refresh_course_stats(pairs=None):
+    where = _offerings(pairs)
+    rows = db.session.execute(_moments(["course_code", "semester"], where)).all()
+
+    bucket = case((Enrollment.score >= 100, BUCKETS - 1), else_=Enrollment.score // 10)
+    histograms = {}
+    for code, semester, b, n in db.session.execute(
+        select(Enrollment.course_code, Enrollment.semester, bucket, func.count())
+        .where(Enrollment.score.is_not(None), where)
+        .group_by(Enrollment.course_code, Enrollment.semester, bucket)
+    ):
+        histograms.setdefault((code, semester), [0] * BUCKETS)[min(max(b, 0), BUCKETS - 1)] += n
+
+    stale = delete(CourseGradeStats)
+    if pairs is not None:
+        stale = stale.where(tuple_(CourseGradeStats.course_code, CourseGradeStats.semester).in_(list(pairs)))
+    db.session.execute(stale)
+    if rows:
+        db.session.execute(insert(CourseGradeStats), [
+            {
+                "course_code": r.course_code,
+                "semester": r.semester,
+                "students": r.n,
+                "mean": r.mean,
+                "median": r.median,
+                "variance": max(r.variance, 0.0),
+                "score_min": r.score_min,
+                "score_max": r.score_max,
+                "histogram": histograms.get((r.course_code, r.semester), [0] * BUCKETS),
+            }
+            for r in rows
+        ])
+
+
+def refresh_class_percentiles(pairs=None):
+    ranked = (
+        select(
+            Enrollment.id,
+            func.percent_rank().over(
+                partition_by=(Enrollment.course_code, Enrollment.semester),
+                order_by=Enrollment.score,
+            ).label("pr"),
+        )
+        .where(Enrollment.score.is_not(None), _offerings(pairs))
+        .subquery()
+    )
+    db.session.execute(
+        update(Enrollment)
+        .where(Enrollment.id == ranked.c.id)
+        .values(class_percentile=ranked.c.pr)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_student_stats(keys=None):
+    """`keys` is an iterable of (account, semester); None means everyone."""
+    if keys is not None:
+        keys = list(keys)
+        if not keys:
+            return
+        where = tuple_(Enrollment.user_account, Enrollment.semester).in_(keys)
+    else:
+        where = true()
+
+    values = {}
+    for r in db.session.execute(_moments(["user_account", "semester"], where)):
+        values[(r.user_account, r.semester)] = {
+            "b_median": r.median,
+            "b_variance": max(r.variance, 0.0),
+        }
+
+    ranked = (
+        select(
+            Enrollment.user_account,
+            Enrollment.semester,
+            Course.name,
+            Enrollment.score,
+            func.row_number().over(
+                partition_by=(Enrollment.user_account, Enrollment.semester),
+                order_by=(Enrollment.score.desc(), Course.code),
+            ).label("top"),
+            func.row_number().over(
+                partition_by=(Enrollment.user_account, Enrollment.semester),
+                order_by=(Enrollment.score.asc(), Course.code),
+            ).label("bottom"),
+        )
+        .join(Course, Course.code == Enrollment.course_code)
+        .where(Enrollment.score.is_not(None), where)
+        .subquery()
+    )
+    for r in db.session.execute(select(ranked).where(or_(ranked.c.top == 1, ranked.c.bottom == 1))):
+        v = values.setdefault((r.user_account, r.semester), {})
+        if r.top == 1:
+            v.update(b_best_course=r.name, b_best_score=r.score)
+        if r.bottom == 1:
+            v.update(b_worst_course=r.name, b_worst_score=r.score)
+
+    for acc, semester, pct in db.session.execute(
+        select(Enrollment.user_account, Enrollment.semester, func.avg(Enrollment.class_percentile))
+        .where(where)
+        .group_by(Enrollment.user_account, Enrollment.semester)
+    ):
+        values.setdefault((acc, semester), {})["b_class_percentile"] = pct
+
+    fields = ["median", "variance", "best_course", "best_score", "worst_course", "worst_score", "class_percentile"]
+    params = [
+        {"b_acc": acc, "b_sem": semester, **{f"b_{f}": v.get(f"b_{f}") for f in fields}}
+        for (acc, semester), v in values.items()
+    ]
+    if params:
+        t = SemesterSummary.__table__
+        db.session.connection().execute(
+            update(t)
+            .where(t.c.user_account == bindparam("b_acc"), t.c.semester == bindparam("b_sem"))
+            .values(
+                score_median=bindparam("b_median"),
+                score_variance=bindparam("b_variance"),
+                best_course=bindparam("b_best_course"),
+                best_score=bindparam("b_best_score"),
+                worst_course=bindparam("b_worst_course"),
+                worst_score=bindparam("b_worst_score"),
+                class_percentile=bindparam("b_class_percentile"),
+            ),
+            params,
+        )
+
+
+def refresh_gpa_percentiles(semesters=None):
+    """Ranks every student's semester GPA within that semester's cohort."""
+    t = SemesterSummary.__table__
+    ranked = (
+        select(
+            t.c.user_account,
+            t.c.semester,
+            func.percent_rank().over(
+                partition_by=t.c.semester,
+                order_by=t.c.grade_points / t.c.graded_credits,
+            ).label("pr"),
+        )
+        .where(t.c.graded_credits > 0)
+    )
+    if semesters is not None:
+        ranked = ranked.where(t.c.semester.in_(list(semesters)))
+    ranked = ranked.subquery()
+    db.session.execute(
+        update(t)
+        .where(t.c.user_account == ranked.c.user_account, t.c.semester == ranked.c.semester)
+        .values(gpa_percentile=ranked.c.pr)
+    )
+
+
+def refresh_for_offerings(pairs):
+    """
+    Incremental refresh after grades changed in the given (course, semester)
+    offerings. The caller commits.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    db.session.flush()
+    refresh_course_stats(pairs)
+    refresh_class_percentiles(pairs)
+    students = db.session.execute(
+        select(Enrollment.user_account, Enrollment.semester)
+        .where(_offerings(pairs))
+        .distinct()
+    ).all()
+    refresh_student_stats([tuple(s) for s in students])
+    refresh_gpa_percentiles({semester for _, semester in pairs})
+
+
+def rebuild_all():
+    """Recomputes every summary from scratch. The caller commits."""
+    db.session.flush()
+    refresh_course_stats()
+    refresh_class_percentiles()
+    refresh_student_stats()
+    refresh_gpa_percentiles()
+
+
+def semester_insights(current: SemesterSummary, previous: SemesterSummary = None, scores=()):
+    """Grades-page insights from precomputed rows; no aggregation happens here."""
+    if current is None or current.score_avg is None:
+        return {
+            "best_course": "–", "best_score": "–", "worst_course": "–", "worst_score": "–",
+            "average": "–", "median": "–", "trending": "–", "score_distribution": [],
+            "attendance_rate": "–", "improvement_since_last": "–", "top_percentile": "–",
+            "consistency": "–", "study_recommendation": "–",
+        }
+
+    improvement = "–"
+    if previous is not None and previous.score_avg:
+        improvement = f"{(current.score_avg - previous.score_avg) / previous.score_avg * 100:+.0f}%"
+
+    stddev = (current.score_variance or 0) ** 0.5
+    if stddev < 5:
+        consistency = "High (low variance in scores)"
+    elif stddev < 12:
+        consistency = "Medium"
+    else:
+        consistency = "Low (scores vary widely)"
+
+    ranked = [s for s in scores if s.get("percentile") is not None]
+    trending = max(ranked, key=lambda s: s["percentile"])["name"] if ranked else "–"
+
+    top = "–"
+    if current.gpa_percentile is not None:
+        top = f"{max(1, round((1 - current.gpa_percentile) * 100))}%"
+
+    return {
+        "best_course": current.best_course,
+        "best_score": current.best_score,
+        "worst_course": current.worst_course,
+        "worst_score": current.worst_score,
+        "average": round(current.score_avg),
+        "median": current.score_median,
+        "trending": trending,
+        "score_distribution": sorted(s["score"] for s in scores if s["score"] is not None),
+        "attendance_rate": "–",
+        "improvement_since_last": improvement,
+        "top_percentile": top,
+        "consistency": consistency,
+        "study_recommendation": f"Focus more on {current.worst_course}",
+    }
@@ -0,0 +1,326 @@
+import re
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, delete, func, select, update
+
+from ...extensions import db
+from ...models.course import Course, CourseGradeStats, CourseReview, Enrollment, ScheduleSlot, SemesterSummary
+from ...metrics import register_cache
+from ..utils.cache import TTLCache
+from ..utils.generations import bump_generation, current_generation
+from . import analytics
+
+# 4.3 scale
+GRADE_POINTS = {
+    "A+": 4.3, "A": 4.0, "A-": 3.7,
+    "B+": 3.3, "B": 3.0, "B-": 2.7,
+    "C+": 2.3, "C": 2.0, "C-": 1.7,
+    "D": 1.0, "F": 0.0,
+}
+PASS_SCORE = 60
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+WEEKDAY_LABELS = ["禮拜一", "禮拜二", "禮拜三", "禮拜四", "禮拜五", "禮拜六", "禮拜日"]
+
+# Cache generations: "catalog" covers courses, reviews and schedules;
+# "grades" covers anything derived from enrollments across students.
+CATALOG = "catalog"
+GRADES = "grades"
+
+# key -> (generation, value); entries are only served while the generation
+# in the database still matches, so a write in any process invalidates them
+_cache = TTLCache(maxsize=1024, ttl=3600)
+register_cache("catalog", lambda: _cache)
+
+
+def letter_grade(score: int) -> str:
+    for floor, letter in (
+        (90, "A+"), (85, "A"), (80, "A-"), (77, "B+"), (73, "B"), (70, "B-"),
+        (67, "C+"), (63, "C"), (60, "C-"), (50, "D"),
+    ):
+        if score >= floor:
+            return letter
+    return "F"
+
+
+def semester_sort_key(semester: str):
+    """"2024 Spring" < "2024 Fall" < "2025 Spring"."""
+    match = re.match(r"(\d{4})\s*(\w+)", semester or "")
+    if not match:
+        return (0, 9, semester)
+    term = {"spring": 0, "summer": 1, "fall": 2, "winter": 3}.get(match.group(2).lower(), 4)
+    return (int(match.group(1)), term, semester)
+
+
+def current_semester() -> str:
+    return current_app.config.get("CURRENT_SEMESTER", "2025 Spring")
+
+
+def _cached(key, generation_name: str, load):
+    generation = current_generation(generation_name)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+    value = load()
+    _cache.set(key, (generation, value), ttl=current_app.config.get("CATALOG_CACHE_TTL", 3600))
+    return value
+
+
+# ---------- reads ----------
+def _course_to_dict(c: Course) -> dict:
+    return {
+        "code": c.code,
+        "name": c.name,
+        "professor": c.professor,
+        "tas": list(c.tas or []),
+        "description": c.description,
+        "credits": c.credits,
+        "materials": list(c.materials or []),
+        "reviews": [{"user": r.author, "rating": r.rating, "comment": r.comment} for r in c.reviews],
+        "assignments_total": c.assignments_total,
+        "enrollment": c.enrollment_count,
+        "tags": list(c.tags or []),
+    }
+
+
+def get_course(code: str):
+    """Course page data as a plain dict, or None."""
+    def load():
+        course = db.session.get(Course, code)
+        return _course_to_dict(course) if course else None
+    return _cached(("course", code), CATALOG, load)
+
+
+def list_courses():
+    def load():
+        rows = db.session.execute(select(Course.code, Course.name).order_by(Course.code))
+        return [{"code": r.code, "name": r.name} for r in rows]
+    return _cached(("courses",), CATALOG, load)
+
+
+def _schedule_slots(semester: str):
+    def load():
+        rows = db.session.execute(
+            select(ScheduleSlot.weekday, ScheduleSlot.hour, ScheduleSlot.room,
+                   ScheduleSlot.status, Course.name)
+            .join(Course, Course.code == ScheduleSlot.course_code)
+            .where(ScheduleSlot.semester == semester)
+            .order_by(ScheduleSlot.weekday, ScheduleSlot.hour)
+        )
+        return [
+            {"weekday": r.weekday, "hour": r.hour, "course": r.name, "room": r.room, "status": r.status}
+            for r in rows
+        ]
+    return _cached(("schedule", semester), CATALOG, load)
+
+
+def get_schedule(semester: str) -> dict:
+    """{"Mon": {9: {"course", "room", "status"}, ...}, ...} for the weekly grid."""
+    grid = {}
+    for slot in _schedule_slots(semester):
+        grid.setdefault(WEEKDAYS[slot["weekday"]], {})[slot["hour"]] = slot
+    return grid
+
+
+def upcoming_slots(semester: str, limit: int = 3, now: datetime = None):
+    """The next `limit` classes from `now`, wrapping around the week."""
+    slots = _schedule_slots(semester)
+    if not slots:
+        return []
+    now = now or datetime.now()
+    position = (now.weekday(), now.hour)
+    start = next((i for i, s in enumerate(slots) if (s["weekday"], s["hour"]) >= position), 0)
+    ordered = slots[start:] + slots[:start]
+    return [
+        {
+            "course": s["course"],
+            "when": f"{WEEKDAY_LABELS[s['weekday']]} {s['hour']:02d}:00",
+            "room": s["room"],
+            "status": s["status"],
+        }
+        for s in ordered[:limit]
+    ]
+
+
+def course_score_history(code: str):
+    """(semesters, average scores) for the course page chart."""
+    def load():
+        rows = db.session.execute(
+            select(CourseGradeStats.semester, CourseGradeStats.mean)
+            .where(CourseGradeStats.course_code == code)
+        ).all()
+        rows.sort(key=lambda r: semester_sort_key(r[0]))
+        return [r[0] for r in rows], [round(r[1]) for r in rows]
+    return _cached(("course_history", code), GRADES, load)
+
+
+def student_semesters(account: str):
+    """The student's SemesterSummary rows, oldest semester first."""
+    rows = SemesterSummary.query.filter(SemesterSummary.user_account == account).all()
+    return sorted(rows, key=lambda s: semester_sort_key(s.semester))
+
+
+def student_scores(account: str, semester: str):
+    rows = db.session.execute(
+        select(Course.name, Course.credits, Enrollment.grade, Enrollment.score, Enrollment.passed,
+               Enrollment.class_percentile)
+        .join(Course, Course.code == Enrollment.course_code)
+        .where(Enrollment.user_account == account, Enrollment.semester == semester)
+        .order_by(Course.code)
+    )
+    return [
+        {"name": r.name, "credits": r.credits, "grade": r.grade, "score": r.score, "passed": r.passed,
+         "percentile": r.class_percentile}
+        for r in rows
+    ]
+
+
+def student_enrollment(account: str, code: str, semester: str):
+    return Enrollment.query.filter_by(user_account=account, course_code=code, semester=semester).first()
+
+
+# ---------- writes ----------
+def refresh_semester_summary(account: str, semester: str):
+    """Recomputes one student's totals for one semester in a single aggregate query."""
+    row = db.session.execute(
+        select(
+            func.count(Enrollment.id).label("courses"),
+            func.coalesce(func.sum(Course.credits), 0).label("credits"),
+            func.coalesce(func.sum(case((Enrollment.grade_points.is_not(None), Course.credits), else_=0)), 0).label("graded_credits"),
+            func.coalesce(func.sum(Enrollment.grade_points * Course.credits), 0).label("grade_points"),
+            func.coalesce(func.sum(case((Enrollment.passed.is_(True), 1), else_=0)), 0).label("passed"),
+            func.coalesce(func.sum(case((Enrollment.passed.is_(False), 1), else_=0)), 0).label("failed"),
+            func.avg(Enrollment.score).label("score_avg"),
+            func.max(Enrollment.score).label("score_max"),
+            func.min(Enrollment.score).label("score_min"),
+        )
+        .join(Course, Course.code == Enrollment.course_code)
+        .where(Enrollment.user_account == account, Enrollment.semester == semester)
+    ).one()
+
+    if not row.courses:
+        db.session.execute(
+            delete(SemesterSummary)
+            .where(SemesterSummary.user_account == account, SemesterSummary.semester == semester)
+        )
+        return
+    db.session.merge(SemesterSummary(
+        user_account=account,
+        semester=semester,
+        courses=row.courses,
+        credits=row.credits,
+        graded_credits=row.graded_credits,
+        grade_points=row.grade_points,
+        passed=row.passed,
+        failed=row.failed,
+        score_avg=row.score_avg,
+        score_max=row.score_max,
+        score_min=row.score_min,
+        updated_at=func.now(),
+    ))
+
+
+def _upsert_enrollment(account, code, semester):
+    enrollment = student_enrollment(account, code, semester)
+    if enrollment is None:
+        enrollment = Enrollment(user_account=account, course_code=code, semester=semester)
+        db.session.add(enrollment)
+        db.session.execute(
+            update(Course).where(Course.code == code)
+            .values(enrollment_count=Course.enrollment_count + 1)
+        )
+    return enrollment
+
+
+def _record_grade(account, code, semester, score=None, grade=None, assignments_completed=None):
+    enrollment = _upsert_enrollment(account, code, semester)
+    if score is not None:
+        enrollment.score = score
+        grade = grade or letter_grade(score)
+    if grade is not None:
+        enrollment.grade = grade
+        enrollment.grade_points = GRADE_POINTS.get(grade)
+        enrollment.passed = score >= PASS_SCORE if score is not None else grade != "F"
+    if assignments_completed is not None:
+        enrollment.assignments_completed = assignments_completed
+    db.session.flush()
+    refresh_semester_summary(account, semester)
+    return enrollment
+
+
+def enroll(account: str, code: str, semester: str):
+    enrollment = _upsert_enrollment(account, code, semester)
+    db.session.flush()
+    refresh_semester_summary(account, semester)
+    bump_generation(CATALOG)    # enrollment_count is on the course page
+    db.session.commit()
+    return enrollment
+
+
+def record_grade(account: str, code: str, semester: str, score: int = None, grade: str = None,
+                 assignments_completed: int = None):
+    """Sets a student's result for a course and refreshes the aggregates that depend on it."""
+    enrollment = _record_grade(account, code, semester, score, grade, assignments_completed)
+    analytics.refresh_for_offerings([(code, semester)])
+    bump_generation(CATALOG)
+    bump_generation(GRADES)
+    db.session.commit()
+    return enrollment
+
+
+def invalidate_catalog():
+    """Drops cached catalog data in every process; call after editing courses directly."""
+    bump_generation(CATALOG)
+    db.session.commit()
+
+
+def load_catalog(data: dict, demo_account: str = None) -> dict:
+    """
+    Upserts courses (replacing their reviews) and replaces the schedule of
+    each semester present in `data`. With `demo_account`, the seed's
+    "demo_grades" are recorded for that user. Returns row counts.
+    """
+    counts = {"courses": 0, "slots": 0, "grades": 0}
+    for c in data.get("courses", []):
+        db.session.merge(Course(
+            code=c["code"],
+            name=c["name"],
+            professor=c.get("professor"),
+            description=c.get("description", ""),
+            credits=c.get("credits", 3),
+            assignments_total=c.get("assignments_total", 0),
+            tas=c.get("tas", []),
+            tags=c.get("tags", []),
+            materials=c.get("materials", []),
+        ))
+        db.session.execute(delete(CourseReview).where(CourseReview.course_code == c["code"]))
+        db.session.add_all(
+            CourseReview(course_code=c["code"], author=r["user"], rating=r["rating"], comment=r.get("comment", ""))
+            for r in c.get("reviews", [])
+        )
+        counts["courses"] += 1
+    db.session.flush()
+
+    for semester, slots in data.get("schedule", {}).items():
+        db.session.execute(delete(ScheduleSlot).where(ScheduleSlot.semester == semester))
+        db.session.add_all(
+            ScheduleSlot(semester=semester, course_code=s["course"], weekday=s["weekday"],
+                         hour=s["hour"], room=s.get("room", ""), status=s.get("status", ""))
+            for s in slots
+        )
+        counts["slots"] += len(slots)
+
+    if demo_account:
+        offerings = set()
+        for entry in data.get("demo_grades", []):
+            _record_grade(demo_account, entry["course"], entry["semester"],
+                          entry.get("score"), entry.get("grade"), entry.get("assignments_completed"))
+            offerings.add((entry["course"], entry["semester"]))
+            counts["grades"] += 1
+        analytics.refresh_for_offerings(offerings)
+
+    bump_generation(CATALOG)
+    bump_generation(GRADES)
+    db.session.commit()
+    return counts
@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+import click
+
+from ...extensions import db
+from . import analytics
+from .catalog import GRADES, load_catalog
+from ..utils.generations import bump_generation
+from .routes import index_bp
+
+DEFAULT_CATALOG = Path(__file__).resolve().parent / "data" / "catalog.json"
+
+
+@index_bp.cli.command("load-catalog")
+@click.argument("path", required=False, type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--demo-grades-for", "account", default=None,
+              help="Also record the seed's sample grades for this account.")
+def load_catalog_command(path, account):
+    """Load courses, reviews and schedules from a JSON file (default: the bundled seed)."""
+    data = json.loads((path or DEFAULT_CATALOG).read_text(encoding="utf-8"))
+    counts = load_catalog(data, demo_account=account)
+    click.echo(f"loaded {counts['courses']} courses, {counts['slots']} schedule slots, {counts['grades']} grades")
+
+
+@index_bp.cli.command("refresh-grade-stats")
+def refresh_grade_stats_command():
+    """Recompute all grade analytics summary tables from enrollments."""
+    analytics.rebuild_all()
+    bump_generation(GRADES)
+    db.session.commit()
+    click.echo("grade analytics rebuilt")
@@ -1,20 +1,66 @@
-from flask import session, redirect, url_for
+from flask import current_app, g, session, redirect, url_for
 from functools import wraps
 from re import fullmatch
-from urllib.request import Request, urlopen
-from urllib.error import URLError
-from urllib.parse import urlparse
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 
+from ...extensions import db
 from ...models.user import User
 from ...models.admin import Admin
+from ...metrics import register_cache
+from .cache import TTLCache
+
+# account -> (column snapshot, is_admin); enabled by CURRENT_USER_CACHE_TTL.
+# Other workers' caches aren't invalidated, so the snapshot leaves out
+# columns that must never be served stale; they load on first access.
+_user_cache = TTLCache(maxsize=4096)
+_UNCACHED_COLUMNS = {"password_hash"}
+register_cache("current_user", lambda: _user_cache)
+
+def _load_user(account: str):
+    cached = _user_cache.get(account)
+    if cached is not None:
+        columns, admin = cached
+        user = User(**columns)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False), admin
+
+    user = (
+        User.query.options(joinedload(User.admin_entry))
+        .filter(User.account == account)
+        .first()
+    )
+    if user is None:
+        return None, False
+
+    admin = bool(user.admin_entry)
+    ttl = current_app.config.get("CURRENT_USER_CACHE_TTL", 0)
+    if ttl:
+        columns = {
+            c.key: getattr(user, c.key) for c in User.__mapper__.column_attrs if c.key not in _UNCACHED_COLUMNS
+        }
+        _user_cache.set(account, (columns, admin), ttl=ttl)
+    return user, admin
+
+def invalidate_user(account: str):
+    """Drops the cached user; call after committing changes to a user or admin row."""
+    _user_cache.pop(account)
+    if g.get("current_user") is not None and g.current_user.account == account:
+        g.pop("current_user")
+        g.pop("current_user_is_admin", None)
 
 def get_current_user() -> User:
+    if "current_user" in g:
+        return g.current_user
+
     account = session.get("account")
-    if not account:
-        return None
-    return User.query.get(account)
+    user, admin = _load_user(account) if account else (None, False)
+    g.current_user = user
+    g.current_user_is_admin = admin
+    return user
 
 def is_admin(user: User) -> bool:
+    if user is not None and user is g.get("current_user"):
+        return g.current_user_is_admin
     return Admin.query.get(user.account) is not None
 
 def is_valid_password(password: str) -> bool:
@@ -38,16 +84,3 @@ def admin_required(f):
             return redirect(url_for("main.index"))
         return f(*args, **kwargs)
     return wrapper
-
-def is_valid_avatar_url(url: str) -> bool:
-    parsed = urlparse(url)
-    if not (parsed.scheme in ("http", "https") and parsed.netloc):
-        return False
-
-    try:
-        req = Request(url, method="HEAD")
-        with urlopen(req, timeout=5) as resp:
-            content_type = resp.headers.get("Content-Type", "").lower()
-            return content_type.startswith("image/")
-    except URLError:
-        return False
\ No newline at end of file
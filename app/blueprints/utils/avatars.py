@@ -0,0 +1,118 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+from flask import current_app
+from sqlalchemy import update
+
+from ...extensions import db
+from ...models.user import User
+from ...metrics import register_cache
+from . import invalidate_user
+from .cache import TTLCache
+
+# url -> bool, host -> False (host unreachable); TTLs are per entry
+_verdicts = TTLCache(maxsize=8192)
+_bad_hosts = TTLCache(maxsize=1024)
+register_cache("avatar_verdicts", lambda: _verdicts)
+
+_inflight = set()
+_inflight_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _is_http_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+def probe_avatar_url(url: str, timeout: float = 5):
+    """
+    HEAD request for `url`. Returns (is_image, host_ok); host_ok is False
+    when the host itself could not be reached, so other URLs on it can be
+    rejected without another round-trip.
+    """
+    try:
+        req = Request(url, method="HEAD")
+        with urlopen(req, timeout=timeout) as resp:
+            content_type = resp.headers.get("Content-Type", "").lower()
+            return content_type.startswith("image/"), True
+    except HTTPError:
+        return False, True
+    except (URLError, HTTPException, OSError, ValueError):
+        return False, False
+
+
+def cached_verdict(url: str):
+    """True/False if the URL (or its host) has a cached verdict, else None."""
+    if not _is_http_url(url):
+        return False
+    if _bad_hosts.get(urlparse(url).netloc) is not None:
+        return False
+    return _verdicts.get(url)
+
+
+def validate_avatar_url(url: str) -> bool:
+    """Blocking, cached validation."""
+    verdict = cached_verdict(url)
+    if verdict is not None:
+        return verdict
+
+    config = current_app.config
+    ok, host_ok = probe_avatar_url(url, timeout=config.get("AVATAR_VALIDATION_TIMEOUT", 5))
+    negative_ttl = config.get("AVATAR_NEGATIVE_TTL", 300)
+    if not host_ok:
+        _bad_hosts.set(urlparse(url).netloc, False, ttl=negative_ttl)
+    _verdicts.set(url, ok, ttl=config.get("AVATAR_CACHE_TTL", 3600) if ok else negative_ttl)
+    return ok
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("AVATAR_VALIDATION_WORKERS", 4),
+                thread_name_prefix="avatar-check",
+            )
+    return _executor
+
+
+def _validate_and_apply(app, account: str, url: str):
+    try:
+        with app.app_context():
+            ok = validate_avatar_url(url)
+            values = {"pending_avatar_url": None}
+            if ok:
+                values["avatar_url"] = url
+            # only settle if the user hasn't submitted another URL meanwhile
+            db.session.execute(
+                update(User)
+                .where(User.account == account, User.pending_avatar_url == url)
+                .values(**values)
+            )
+            db.session.commit()
+            invalidate_user(account)
+    except Exception:
+        with app.app_context():
+            current_app.logger.exception("avatar validation failed for %s", url)
+    finally:
+        with _inflight_lock:
+            _inflight.discard((account, url))
+
+
+def submit_avatar_validation(account: str, url: str):
+    """
+    Validates `url` in the background and, once it checks out, promotes
+    users.pending_avatar_url to avatar_url for `account`.
+    """
+    app = current_app._get_current_object()
+    with _inflight_lock:
+        if (account, url) in _inflight:
+            return
+        _inflight.add((account, url))
+    _get_executor(app).submit(_validate_and_apply, app, account, url)
@@ -0,0 +1,41 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, request
+
+
+def make_etag(*parts) -> str:
+    """Strong validator over `parts` plus the query string, which selects the representation."""
+    raw = "|".join(str(p) for p in parts) + "|" + request.query_string.decode("latin-1")
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _utc(ts: datetime):
+    if ts is None:
+        return None
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def set_validators(resp, etag: str, last_modified: datetime = None):
+    resp.set_etag(etag)
+    if last_modified is not None:
+        resp.last_modified = _utc(last_modified)
+    # per-user API: browsers may keep it, but must revalidate every time
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def not_modified(etag: str, last_modified: datetime = None):
+    """
+    A 304 response when the request's validators still match, else None.
+    If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = _utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return set_validators(current_app.response_class(status=304), etag, last_modified)
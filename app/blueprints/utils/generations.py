@@ -0,0 +1,40 @@
+from flask import g
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...extensions import db
+from ...models.generation import CacheGeneration
+
+
+def _insert(model):
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def generation_state(name: str):
+    """(generation, updated_at) of the named counter, read at most once per request/app context."""
+    seen = g.setdefault("_cache_generations", {})
+    if name not in seen:
+        row = db.session.execute(
+            select(CacheGeneration.generation, CacheGeneration.updated_at).where(CacheGeneration.name == name)
+        ).first()
+        seen[name] = tuple(row) if row else (0, None)
+    return seen[name]
+
+
+def current_generation(name: str) -> int:
+    return generation_state(name)[0]
+
+
+def bump_generation(name: str):
+    """Increments the counter in the current transaction; the caller commits."""
+    db.session.execute(
+        _insert(CacheGeneration)
+        .values(name=name, generation=1)
+        .on_conflict_do_update(
+            index_elements=["name"],
+            set_={"generation": CacheGeneration.generation + 1, "updated_at": func.now()},
+        )
+    )
+    g.setdefault("_cache_generations", {}).pop(name, None)
@@ -0,0 +1,71 @@
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+
+from ...extensions import db
+from ...metrics import SQL_STATEMENT_SECONDS
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+    if has_app_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    SQL_STATEMENT_SECONDS.observe(elapsed)
+    if has_app_context():
+        g.query_seconds = g.get("query_seconds", 0.0) + elapsed
+
+
+def init_query_counter(app):
+    """
+    Counts SQL statements and their time per app context (`g.query_count`,
+    `g.query_seconds`). The only statement counter: query budgets and the
+    request metrics both read it.
+    """
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def query_count() -> int:
+    return g.get("query_count", 0)
+
+
+def query_seconds() -> float:
+    return g.get("query_seconds", 0.0)
+
+
+def query_budget(limit: int):
+    """
+    Caps the number of SQL statements a view may issue, including the
+    current-user lookup. Over budget raises QueryBudgetExceeded when
+    QUERY_BUDGET_STRICT is set (tests, benchmarks) and logs otherwise.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            start = query_count()
+            rv = f(*args, **kwargs)
+            used = query_count() - start
+            if used > limit:
+                msg = f"{f.__name__} issued {used} queries (budget {limit})"
+                if current_app.config.get("QUERY_BUDGET_STRICT"):
+                    raise QueryBudgetExceeded(msg)
+                current_app.logger.warning(msg)
+            return rv
+        wrapper.query_budget = limit
+        return wrapper
+    return decorator
@@ -1,5 +1,28 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
+
+def _include_object(obj, name, type_, reflected, compare_to):
+    # FTS5 virtual tables (and their shadow tables) are managed by hand-written
+    # migrations; keep autogenerate from trying to drop them.
+    if type_ == "table" and reflected and compare_to is None:
+        return not (name.endswith("_fts") or "_fts_" in name)
+    return True
 
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate(include_object=_include_object)
+
+def init_engine(app):
+    """Runs SQLITE_PRAGMAS on every new SQLite DBAPI connection."""
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        engine = db.engine
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, conn_record):
+        cursor = dbapi_conn.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f"PRAGMA {key}={value}")
+        cursor.close()
@@ -0,0 +1,230 @@
+"""
+In-process metrics, exposed in the Prometheus text format by the admin
+blueprint's /metrics. Values are per process; scrape every worker (or sum
+them downstream) under gunicorn.
+
+Request latency, in-flight requests and per-request SQL counts/time are
+recorded by `init_metrics`; streamed responses are timed until the body
+is closed. SQL is counted by the query counter (blueprints/utils/queries.py). Other modules create their own Counter /
+Gauge / Histogram objects, and register caches (anything with `hits` and
+`misses`) or scrape-time collectors for values they already track.
+"""
+import bisect
+import threading
+import time
+
+from flask import g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+_collectors = []
+_caches = {}
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels.items()
+    )
+    return "{" + body + "}"
+
+
+def _format_value(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict):
+        return tuple(str(labels.get(k, "")) for k in self.labels)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labels, key))
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, running
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+def register_cache(name: str, getter):
+    """`getter()` returns an object with `hits`/`misses` (and len()), or None if not built yet."""
+    _caches[name] = getter
+
+
+def collector(fn):
+    """
+    Registers `fn()`, called at scrape time inside the request context, which
+    yields (name, type, help, labels, value) for values tracked elsewhere.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+@collector
+def _cache_samples():
+    for name, getter in sorted(_caches.items()):
+        cache = getter()
+        if cache is None:
+            continue
+        hits, misses = cache.hits, cache.misses
+        labels = {"cache": name}
+        yield "schoolplus_cache_hits_total", "counter", "Cache lookups served from the cache.", labels, hits
+        yield "schoolplus_cache_misses_total", "counter", "Cache lookups that missed.", labels, misses
+        yield ("schoolplus_cache_hit_ratio", "gauge", "hits / (hits + misses) since process start.",
+               labels, hits / (hits + misses) if hits + misses else 0.0)
+        yield "schoolplus_cache_entries", "gauge", "Entries currently held.", labels, len(cache)
+
+
+def render() -> str:
+    families = {}
+    for metric in _metrics:
+        family = families.setdefault(metric.name, (metric.type, metric.help, []))
+        family[2].extend(metric.samples())
+    for fn in _collectors:
+        for name, type_, help, labels, value in fn():
+            families.setdefault(name, (type_, help, []))[2].append((name, labels, value))
+
+    lines = []
+    for name, (type_, help, samples) in families.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {type_}")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- request + SQL instrumentation ----------
+REQUEST_SECONDS = Histogram(
+    "schoolplus_request_seconds", "Request latency by endpoint.", ["endpoint", "method", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "schoolplus_requests_in_flight", "Requests currently being handled.", ["endpoint"]
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "schoolplus_request_sql_queries", "SQL statements issued per request.", ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "schoolplus_request_sql_seconds", "Time spent in SQL per request.", ["endpoint"],
+)
+SQL_STATEMENT_SECONDS = Histogram(
+    "schoolplus_sql_statement_seconds", "Duration of individual SQL statements.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def _endpoint() -> str:
+    # unmatched URLs share one label so scanners can't blow up cardinality
+    return request.endpoint or "<unmatched>"
+
+
+def init_metrics(app):
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    # imported here: the blueprints package imports this module at load time
+    from .blueprints.utils.queries import query_count, query_seconds
+
+    @app.before_request
+    def _start_request():
+        g._metrics_started = time.perf_counter()
+        g._metrics_endpoint = _endpoint()
+        REQUESTS_IN_FLIGHT.inc(endpoint=g._metrics_endpoint)
+
+    @app.after_request
+    def _record_request(response):
+        started = g.get("_metrics_started")
+        if started is None:
+            return response
+        endpoint = g._metrics_endpoint
+        method = request.method
+        status = response.status_code
+
+        def record(queries, sql_seconds):
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=method, status=status)
+            REQUEST_SQL_QUERIES.observe(queries, endpoint=endpoint)
+            REQUEST_SQL_SECONDS.observe(sql_seconds, endpoint=endpoint)
+
+        if response.is_streamed:
+            # e.g. /ai/stream: the view returned at the first byte; count the whole body
+            ctx_g = g._get_current_object()
+            response.call_on_close(
+                lambda: record(ctx_g.get("query_count", 0), ctx_g.get("query_seconds", 0.0))
+            )
+        else:
+            record(query_count(), query_seconds())
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        endpoint = g.pop("_metrics_endpoint", None)
+        if endpoint is not None:
+            REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
@@ -0,0 +1,93 @@
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy import DDL, event, func
+from ..extensions import db
+
+def new_conversation_id() -> str:
+    # random 128-bit ids: safe to mint on any worker or node without coordination
+    return uuid4().hex
+
+class Conversation(db.Model):
+    __tablename__ = "conversations"
+
+    id = db.Column(db.String(32), primary_key=True, default=new_conversation_id)
+    user_account = db.Column(
+        db.String(16), db.ForeignKey("users.account", ondelete="CASCADE"), nullable=False
+    )
+    title = db.Column(db.String(200), nullable=False, default="New Conversation")
+    # bumped on every change to the conversation or its messages; lets
+    # per-process caches detect writes made by other workers
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # rolling summary of every message with id <= summary_upto; see
+    # blueprints/chatbot/context.py
+    summary = db.Column(db.Text, nullable=True)
+    summary_upto = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    messages = db.relationship(
+        "ChatMessage",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="ChatMessage.id",
+    )
+
+    __table_args__ = (
+        db.Index("ix_conversations_user_updated", "user_account", "updated_at"),
+    )
+
+class ChatMessage(db.Model):
+    __tablename__ = "chat_messages"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    conversation_id = db.Column(
+        db.String(32), db.ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False
+    )
+    role = db.Column(db.String(16), nullable=False)
+    content = db.Column(db.Text, nullable=False, default="")
+    # python-side default so the timestamp is known without re-reading the row
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.now, server_default=func.now(), nullable=False)
+
+    conversation = db.relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        db.Index("ix_chat_messages_conversation_id", "conversation_id", "id"),
+    )
+
+
+# Full-text index over message content for sidebar search (SQLite FTS5,
+# external content, trigram). Same pattern as issues_fts in models/issue.py;
+# mirrors migration e8f1b4c7a9d2.
+CHAT_MESSAGES_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+        content, content='chat_messages', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF content ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+for _stmt in CHAT_MESSAGES_FTS_DDL:
+    event.listen(ChatMessage.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+
+event.listen(
+    ChatMessage.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS chat_messages_fts").execute_if(dialect="sqlite"),
+)
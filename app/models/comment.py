@@ -10,10 +10,15 @@ class Comment(db.Model):
         db.Integer,
         db.ForeignKey("issues.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     body = db.Column(db.Text, nullable=False)
     upvote = db.Column(db.Integer, default=0, nullable=False)
 
     issue = db.relationship("Issue", back_populates="comments")
-    author = db.relationship("User", back_populates="comments")
\ No newline at end of file
+    author = db.relationship("User", back_populates="comments")
+
+    # comment pages are walked per issue by id, or by upvotes (forum/pagination.py)
+    __table_args__ = (
+        db.Index("ix_comments_issue_id_id", "issue_id", "id"),
+        db.Index("ix_comments_issue_upvote", "issue_id", "upvote", "id"),
+    )
@@ -0,0 +1,141 @@
+from sqlalchemy import func
+from ..extensions import db
+
+# Course catalog, weekly schedule and enrollments. Loaded by
+# `flask index load-catalog` (blueprints/index/catalog.py), which is also
+# where every write goes so the aggregates below stay current.
+
+class Course(db.Model):
+    __tablename__ = "courses"
+
+    code = db.Column(db.String(16), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    professor = db.Column(db.String(100), nullable=True)
+    description = db.Column(db.Text, nullable=False, default="")
+    credits = db.Column(db.Integer, nullable=False, default=3)
+    assignments_total = db.Column(db.Integer, nullable=False, default=0)
+    tas = db.Column(db.JSON, nullable=False, default=list)
+    tags = db.Column(db.JSON, nullable=False, default=list)
+    materials = db.Column(db.JSON, nullable=False, default=list)
+    # maintained on enroll/drop rather than counted per page view
+    enrollment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    reviews = db.relationship(
+        "CourseReview", cascade="all, delete-orphan", order_by="CourseReview.id"
+    )
+
+
+class CourseReview(db.Model):
+    __tablename__ = "course_reviews"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    course_code = db.Column(
+        db.String(16), db.ForeignKey("courses.code", ondelete="CASCADE"), nullable=False, index=True
+    )
+    author = db.Column(db.String(64), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text, nullable=False, default="")
+
+
+class ScheduleSlot(db.Model):
+    __tablename__ = "schedule_slots"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    semester = db.Column(db.String(32), nullable=False)
+    course_code = db.Column(
+        db.String(16), db.ForeignKey("courses.code", ondelete="CASCADE"), nullable=False
+    )
+    weekday = db.Column(db.Integer, nullable=False)     # 0 = Monday
+    hour = db.Column(db.Integer, nullable=False)
+    room = db.Column(db.String(64), nullable=False, default="")
+    status = db.Column(db.String(32), nullable=False, default="")
+
+    course = db.relationship("Course")
+
+    __table_args__ = (
+        db.Index("ix_schedule_slots_semester_time", "semester", "weekday", "hour"),
+    )
+
+
+class Enrollment(db.Model):
+    __tablename__ = "enrollments"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_account = db.Column(
+        db.String(16), db.ForeignKey("users.account", ondelete="CASCADE"), nullable=False
+    )
+    course_code = db.Column(
+        db.String(16), db.ForeignKey("courses.code", ondelete="CASCADE"), nullable=False, index=True
+    )
+    semester = db.Column(db.String(32), nullable=False)
+    score = db.Column(db.Integer, nullable=True)
+    grade = db.Column(db.String(4), nullable=True)
+    # derived from `grade` at write time so aggregates are plain SUMs
+    grade_points = db.Column(db.Float, nullable=True)
+    passed = db.Column(db.Boolean, nullable=True)
+    # percent_rank() of the score within (course, semester); 1.0 = top of class
+    class_percentile = db.Column(db.Float, nullable=True)
+    assignments_completed = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    course = db.relationship("Course")
+
+    __table_args__ = (
+        db.UniqueConstraint("user_account", "course_code", "semester", name="uq_enrollments_user_course_semester"),
+        db.Index("ix_enrollments_user_semester", "user_account", "semester"),
+    )
+
+
+class SemesterSummary(db.Model):
+    """Per-student, per-semester totals, recomputed whenever an enrollment changes."""
+
+    __tablename__ = "semester_summaries"
+
+    user_account = db.Column(
+        db.String(16), db.ForeignKey("users.account", ondelete="CASCADE"), primary_key=True
+    )
+    semester = db.Column(db.String(32), primary_key=True)
+    courses = db.Column(db.Integer, nullable=False, default=0)
+    credits = db.Column(db.Integer, nullable=False, default=0)
+    graded_credits = db.Column(db.Integer, nullable=False, default=0)
+    grade_points = db.Column(db.Float, nullable=False, default=0)
+    passed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    score_avg = db.Column(db.Float, nullable=True)
+    score_max = db.Column(db.Integer, nullable=True)
+    score_min = db.Column(db.Integer, nullable=True)
+    # written by index/analytics.py
+    score_median = db.Column(db.Float, nullable=True)
+    score_variance = db.Column(db.Float, nullable=True)
+    best_course = db.Column(db.String(100), nullable=True)
+    best_score = db.Column(db.Integer, nullable=True)
+    worst_course = db.Column(db.String(100), nullable=True)
+    worst_score = db.Column(db.Integer, nullable=True)
+    class_percentile = db.Column(db.Float, nullable=True)
+    gpa_percentile = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @property
+    def gpa(self):
+        if not self.graded_credits:
+            return None
+        return round(self.grade_points / self.graded_credits, 2)
+
+
+class CourseGradeStats(db.Model):
+    """Score statistics per course offering, written by index/analytics.py."""
+
+    __tablename__ = "course_grade_stats"
+
+    course_code = db.Column(
+        db.String(16), db.ForeignKey("courses.code", ondelete="CASCADE"), primary_key=True
+    )
+    semester = db.Column(db.String(32), primary_key=True)
+    students = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=True)
+    median = db.Column(db.Float, nullable=True)
+    variance = db.Column(db.Float, nullable=True)
+    score_min = db.Column(db.Integer, nullable=True)
+    score_max = db.Column(db.Integer, nullable=True)
+    # counts per 10-point bucket: [0-9, 10-19, ..., 90-100]
+    histogram = db.Column(db.JSON, nullable=False, default=list)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
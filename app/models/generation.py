@@ -0,0 +1,16 @@
+from sqlalchemy import func
+from ..extensions import db
+
+
+class CacheGeneration(db.Model):
+    """
+    Named counters bumped on every write to a cached data set, so
+    per-process caches in other workers can tell their copy is stale.
+    """
+
+    __tablename__ = "cache_generations"
+
+    name = db.Column(db.String(32), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    # when `generation` last moved; served as Last-Modified for list endpoints
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,5 +1,7 @@
+from sqlalchemy import DDL, event, func
 from ..extensions import db
 from .comment import Comment
+from .label import Label, issue_labels
 
 class Issue(db.Model):
     __tablename__ = "issues"
@@ -9,6 +11,12 @@ class Issue(db.Model):
     title = db.Column(db.String(200), nullable=False)
     body = db.Column(db.Text, nullable=False)
     upvote = db.Column(db.Integer, default=0, nullable=False)
+    # kept in step by forum_add_comment so views never count the thread
+    comment_count = db.Column(db.Integer, default=0, nullable=False, server_default="0")
+    # bumped with anything the detail view shows; ETag/Last-Modified (forum/versions.py)
+    version = db.Column(db.Integer, default=1, nullable=False, server_default="1")
+    updated_at = db.Column(db.DateTime(timezone=True), default=func.now(), nullable=True)
+    # primary category as entered; filtering and display use `labels`
     label = db.Column(db.String(64), nullable=True)
 
     comments = db.relationship(
@@ -19,3 +27,49 @@ class Issue(db.Model):
         "User",
         foreign_keys=[author_id]
     )
+
+    labels = db.relationship(Label, secondary=issue_labels, order_by=Label.name)
+
+    __table_args__ = (
+        # top-N by upvotes (forum/leaderboard.py) reads this index backwards
+        db.Index("ix_issues_upvote_id", "upvote", "id"),
+        # max(updated_at) validates the card lists (forum/versions.py)
+        db.Index("ix_issues_updated_at", "updated_at"),
+    )
+
+
+# Full-text index over title + body (SQLite FTS5, external content table).
+# The triggers keep it in sync with every insert/update/delete on `issues`,
+# including bulk statements that bypass the ORM. Mirrors migration 2d7e1a9c4b61.
+ISSUES_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5(
+        title, body, content='issues', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issues_fts_ai AFTER INSERT ON issues BEGIN
+        INSERT INTO issues_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issues_fts_ad AFTER DELETE ON issues BEGIN
+        INSERT INTO issues_fts(issues_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS issues_fts_au AFTER UPDATE OF title, body ON issues BEGIN
+        INSERT INTO issues_fts(issues_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO issues_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+for _stmt in ISSUES_FTS_DDL:
+    event.listen(Issue.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+
+event.listen(
+    Issue.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS issues_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,19 @@
+from ..extensions import db
+
+# Issues <-> labels. The primary key serves "labels of an issue"; the
+# reversed index serves "issues with a label", newest first, for filters.
+issue_labels = db.Table(
+    "issue_labels",
+    db.Column("issue_id", db.Integer, db.ForeignKey("issues.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("label_id", db.Integer, db.ForeignKey("labels.id", ondelete="CASCADE"), primary_key=True),
+    db.Index("ix_issue_labels_label_issue", "label_id", "issue_id"),
+)
+
+
+class Label(db.Model):
+    __tablename__ = "labels"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(64), nullable=False, unique=True)   # normalized, see forum/labels.py
+    # maintained when labels are attached, so facet counts never scan issue_labels
+    issue_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
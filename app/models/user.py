@@ -1,6 +1,6 @@
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import func
 from ..extensions import db
+from ..passwords import get_hashing_service
 
 class User(db.Model):
     __tablename__ = "users"
@@ -11,9 +11,14 @@ class User(db.Model):
     name = db.Column(db.String(64), nullable=False)
     display_name = db.Column(db.String(16), nullable=False)
     avatar_url = db.Column(db.String(512), nullable=True)
+    # Submitted avatar awaiting background validation (utils/avatars.py).
+    pending_avatar_url = db.Column(db.String(512), nullable=True)
     
     create_date = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # Upvotes on this user's issues and comments, bumped atomically on each vote.
+    upvotes_received = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
     # Relationships
     admin_entry = db.relationship(
         "Admin",
@@ -33,8 +38,12 @@ class User(db.Model):
         cascade="all, delete-orphan"
     )
     
+    # Hashing runs on the configured backend/pool and may raise HashingBusy.
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hashing_service().hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return get_hashing_service().verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return get_hashing_service().needs_rehash(self.password_hash)
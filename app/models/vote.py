@@ -0,0 +1,29 @@
+from sqlalchemy import func
+from ..extensions import db
+
+# One row per (voter, target). The composite primary key is the unique index
+# that rejects duplicate votes, so casting a vote never needs a lookup first.
+
+class IssueVote(db.Model):
+    __tablename__ = "issue_votes"
+
+    user_account = db.Column(
+        db.String(16), db.ForeignKey("users.account", ondelete="CASCADE"), primary_key=True
+    )
+    issue_id = db.Column(
+        db.Integer, db.ForeignKey("issues.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    # "hot" ranking loads the recent window of votes
+    create_date = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
+class CommentVote(db.Model):
+    __tablename__ = "comment_votes"
+
+    user_account = db.Column(
+        db.String(16), db.ForeignKey("users.account", ondelete="CASCADE"), primary_key=True
+    )
+    comment_id = db.Column(
+        db.Integer, db.ForeignKey("comments.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    create_date = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,117 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated for longer than the queue timeout."""
+
+
+class WerkzeugHasher:
+    """
+    Default backend. `method` is a full werkzeug method string so stored
+    hashes can be compared against it, e.g. "scrypt:32768:8:1" or
+    "pbkdf2:sha256:600000".
+    """
+
+    def __init__(self, method: str = "scrypt:32768:8:1"):
+        self.method = method
+
+    def hash(self, password: str) -> str:
+        return generate_password_hash(password, method=self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return password_hash.split("$", 1)[0] != self.method
+
+
+def _load_hasher(app):
+    path = app.config.get("PASSWORD_HASHER", "app.passwords.WerkzeugHasher")
+    module, _, name = path.rpartition(".")
+    cls = getattr(import_module(module), name)
+    return cls(app.config.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1"))
+
+
+class HashingService:
+    """
+    Runs the configured hasher on a bounded process pool so CPU-heavy KDFs
+    run outside this process's GIL. The calling thread still waits for the
+    result, so at most `max_queue` jobs may be in flight per worker process;
+    beyond that callers wait up to `queue_timeout` seconds (0 fails at once)
+    and then get HashingBusy. With `workers=0` hashing runs inline.
+    """
+
+    def __init__(self, hasher, workers=0, max_queue=32, queue_timeout=5.0):
+        self.hasher = hasher
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # pools don't survive fork; each gunicorn worker builds its own
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy()
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(self.hasher.verify, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return self.hasher.needs_rehash(password_hash)
+
+    def hash_many(self, passwords, chunksize=16):
+        """Hashes an iterable of passwords in parallel, preserving order."""
+        if not self.workers:
+            return [self.hasher.hash(p) for p in passwords]
+        return list(self._executor().map(self.hasher.hash, passwords, chunksize=chunksize))
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown()
+            self._pool = None
+
+
+_create_lock = threading.Lock()
+
+
+def get_hashing_service() -> HashingService:
+    app = current_app._get_current_object()
+    service = app.extensions.get("password_hashing")
+    if service is not None:
+        return service
+    with _create_lock:
+        service = app.extensions.get("password_hashing")
+        if service is None:
+            service = app.extensions["password_hashing"] = HashingService(
+                _load_hasher(app),
+                workers=app.config.get("PASSWORD_HASH_WORKERS", 0),
+                max_queue=app.config.get("PASSWORD_HASH_MAX_QUEUE", 32),
+                queue_timeout=app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", 5.0),
+            )
+    return service
@@ -0,0 +1,305 @@
+"""
+On-demand profiling of individual live requests.
+
+A request is profiled when an admin sends `X-Profile: sample` (or
+`cprofile`), or at random with probability PROFILE_SAMPLE_RATE. Two modes:
+
+  sample    a helper thread snapshots the request thread's stack every
+            PROFILE_SAMPLE_INTERVAL seconds; cheap enough for production.
+            Downloadable as collapsed stacks (flamegraph.pl / speedscope).
+  cprofile  deterministic cProfile of the request thread; much slower, but
+            exact call counts. Downloadable as a pstats file.
+
+Either way every SQL statement is recorded with its duration and the
+first application frame that issued it. The last PROFILE_BUFFER_SIZE
+profiles are kept as files under PROFILE_DIR, shared by all worker
+processes; the admin blueprint serves them. Streamed responses are
+profiled up to the point the view returns: the profile is closed in
+after_request, before the body is generated.
+"""
+import cProfile
+import itertools
+import json
+import marshal
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+MODES = ("sample", "cprofile")
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = {os.path.abspath(__file__), os.path.join(_APP_DIR, "metrics.py")}
+_ids = itertools.count(1)
+_ID = re.compile(r"\d+-\d+")
+
+
+def _short(filename: str) -> str:
+    if filename.startswith(_APP_DIR):
+        return "app" + filename[len(_APP_DIR):]
+    return os.path.basename(filename)
+
+
+def _call_site() -> str:
+    """The innermost frame in application code, skipping this module."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename not in _SKIP_FILES:
+            return f"{_short(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class StackSampler:
+    """Samples one thread's stack on a helper thread into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{_short(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class ProfileStore:
+    """
+    The last `size` finished profiles (dicts), kept as files in `directory`
+    so every worker process lists and serves the same set: <id>.json, plus
+    <id>.pstats for cprofile runs. Files are written whole and renamed into
+    place; the oldest are pruned after each add.
+    """
+
+    def __init__(self, directory, size: int):
+        self.directory = Path(directory)
+        self.size = size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, profile_id: str, suffix: str) -> Path:
+        return self.directory / f"{profile_id}{suffix}"
+
+    def _write(self, path: Path, data: bytes):
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def add(self, profile: dict):
+        profile_id = profile["id"]
+        if profile["pstats"] is not None:
+            self._write(self._path(profile_id, ".pstats"), profile["pstats"])
+        meta = {**profile, "pstats": profile["pstats"] is not None}
+        self._write(self._path(profile_id, ".json"), json.dumps(meta).encode())
+        for old in self._ids()[:-self.size or None]:
+            for suffix in (".json", ".pstats"):
+                self._path(old, suffix).unlink(missing_ok=True)
+
+    def _ids(self):
+        """Stored profile ids, oldest first, without reading the files."""
+        stamped = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stamped.append((path.stat().st_mtime, path.stem))
+            except OSError:
+                continue
+        return [profile_id for _, profile_id in sorted(stamped)]
+
+    def _load(self, path: Path):
+        try:
+            profile = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None  # pruned by another process meanwhile
+        if profile["pstats"]:
+            try:
+                profile["pstats"] = self._path(profile["id"], ".pstats").read_bytes()
+            except OSError:
+                return None
+        else:
+            profile["pstats"] = None
+        return profile
+
+    def list(self):
+        """Oldest first."""
+        profiles = (self._load(path) for path in self.directory.glob("*.json"))
+        return sorted((p for p in profiles if p is not None), key=lambda p: p["started_at"])
+
+    def get(self, profile_id: str):
+        if not _ID.fullmatch(profile_id):
+            return None
+        return self._load(self._path(profile_id, ".json"))
+
+
+_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    app = current_app._get_current_object()
+    store = app.extensions.get("profiles")
+    if store is not None:
+        return store
+    with _store_lock:
+        store = app.extensions.get("profiles")
+        if store is None:
+            store = app.extensions["profiles"] = ProfileStore(
+                app.config.get("PROFILE_DIR") or Path(app.instance_path) / "profiles",
+                app.config.get("PROFILE_BUFFER_SIZE", 20),
+            )
+    return store
+
+
+def summary(profile: dict) -> dict:
+    """A profile without its payloads, for listings."""
+    return {
+        "id": profile["id"],
+        "mode": profile["mode"],
+        "method": profile["method"],
+        "path": profile["path"],
+        "endpoint": profile["endpoint"],
+        "status": profile["status"],
+        "started_at": profile["started_at"],
+        "duration_ms": profile["duration_ms"],
+        "samples": profile["samples"],
+        "sql_count": len(profile["sql"]),
+        "sql_ms": round(sum(s["ms"] for s in profile["sql"]), 3),
+    }
+
+
+# ---------- request hooks ----------
+def _requested_mode():
+    """The mode to profile this request with, or None."""
+    config = current_app.config
+    if request.blueprint == "admin" or request.endpoint in (None, "static"):
+        return None
+    header = (request.headers.get("X-Profile") or "").strip().lower()
+    if header:
+        # imported here: the blueprints package imports app modules at load time
+        from .blueprints.utils import get_current_user, is_admin
+        user = get_current_user()
+        if user is not None and is_admin(user):
+            return header if header in MODES else config.get("PROFILE_MODE", "sample")
+    rate = config.get("PROFILE_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return config.get("PROFILE_MODE", "sample")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and g.get("_profile") is not None and context is not None:
+        context._profile_started = time.perf_counter()
+        context._profile_site = _call_site()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profile_started", None)
+    if started is None or not has_app_context():
+        return
+    profile = g.get("_profile")
+    if profile is not None:
+        profile["sql"].append({
+            "ms": round((time.perf_counter() - started) * 1000, 3),
+            "site": context._profile_site,
+            "statement": " ".join(statement.split())[:1000],
+            "executemany": executemany,
+        })
+
+
+def init_profiling(app):
+    if not app.config.get("PROFILE_ENABLED", True):
+        return
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_profile():
+        mode = _requested_mode()
+        if mode is None:
+            return
+        profile = {
+            "id": f"{os.getpid()}-{next(_ids)}",
+            "mode": mode,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": None,
+            "started_at": time.time(),
+            "duration_ms": None,
+            "samples": None,  # stack samples taken; sample mode only
+            "sql": [],
+            "collapsed": None,
+            "pstats": None,
+        }
+        if mode == "cprofile":
+            g._profiler = cProfile.Profile()
+            g._profiler.enable()
+        else:
+            g._profiler = StackSampler(threading.get_ident(), app.config.get("PROFILE_SAMPLE_INTERVAL", 0.005))
+            g._profiler.start()
+        g._profile = profile
+        g._profile_clock = time.perf_counter()
+
+    @app.after_request
+    def _tag_profile(response):
+        profile = g.get("_profile")
+        if profile is not None:
+            profile["status"] = response.status_code
+            response.headers["X-Profile-Id"] = profile["id"]
+            if response.is_streamed:
+                # stream_with_context would keep the request (and the profiler)
+                # alive for as long as the client reads; stop at the view's return
+                _finish_profile()
+        return response
+
+    @app.teardown_request
+    def _teardown_profile(exc):
+        _finish_profile()
+
+
+def _finish_profile():
+    """Stops the current request's profiler, if any, and stores the profile."""
+    profile = g.pop("_profile", None)
+    if profile is None:
+        return
+    profiler = g.pop("_profiler")
+    profile["duration_ms"] = round((time.perf_counter() - g.pop("_profile_clock")) * 1000, 3)
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.create_stats()
+        profile["pstats"] = marshal.dumps(profiler.stats)
+    else:
+        profiler.stop()
+        profile["collapsed"] = profiler.collapsed()
+        profile["samples"] = sum(profiler.stacks.values())
+    if profile["status"] is None:
+        profile["status"] = 500
+    get_profile_store().add(profile)
@@ -100,7 +100,7 @@
             disableSend(true);
 
             try {
-                const res = await fetch("/ai/send", {
+                const res = await fetch("/ai/stream", {
                     method: "POST",
                     headers: { "Content-Type": "application/json" },
                     body: JSON.stringify({
@@ -110,14 +110,34 @@
                         temperature
                     })
                 });
-                const data = await res.json();
-
-                if (data.chat_id && chatIdEl) chatIdEl.value = data.chat_id;
-                if (Array.isArray(data.messages)) {
-                    // First message is the user (already appended), next is AI
-                    const ai = data.messages.find((m) => m.role === "assistant");
-                    if (ai) appendMessage("assistant", ai.content, ai.timestamp);
+                if (res.status === 429) {
+                    appendSystem("You're sending messages too quickly. Please wait a moment and try again.");
+                    return;
                 }
+                if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+                // Server-Sent Events: "start", then "delta" per token chunk, then "done"
+                let bubble = null;
+                let text = "";
+                await readEvents(res.body, (evt) => {
+                    if (evt.type === "start") {
+                        if (evt.chat_id && chatIdEl) chatIdEl.value = evt.chat_id;
+                    } else if (evt.type === "delta") {
+                        if (!bubble) {
+                            showTyping(false);
+                            bubble = appendMessage("assistant", "");
+                        }
+                        text += evt.content;
+                        bubble.text.textContent = text;
+                        scrollToBottom();
+                    } else if (evt.type === "done") {
+                        if (!bubble) bubble = appendMessage("assistant", evt.message.content, evt.message.timestamp);
+                        bubble.text.textContent = evt.message.content;
+                        if (bubble.copy) bubble.copy.setAttribute("data-text", evt.message.content);
+                    } else if (evt.type === "error") {
+                        appendSystem("Oops, something went wrong. Please try again.");
+                    }
+                });
             } catch (err) {
                 console.error(err);
                 appendSystem("Oops, something went wrong. Please try again.");
@@ -176,6 +196,25 @@
         wrap.appendChild(bubble);
         row.appendChild(wrap);
         chatScroll.appendChild(row);
+        return { text: bubble.querySelector("p"), copy: bubble.querySelector(".btn-copy") };
+    }
+
+    async function readEvents(body, onEvent) {
+        const reader = body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let sep;
+            while ((sep = buffer.indexOf("\n\n")) !== -1) {
+                const frame = buffer.slice(0, sep);
+                buffer = buffer.slice(sep + 2);
+                const data = frame.split("\n").filter((l) => l.startsWith("data: ")).map((l) => l.slice(6)).join("\n");
+                if (data) onEvent(JSON.parse(data));
+            }
+        }
     }
 
     function appendSystem(text) {
@@ -235,4 +274,37 @@
         URL.revokeObjectURL(url);
         a.remove();
     });
+
+    // Sidebar: fetch further pages of conversations on demand
+    const convList = byId("convList");
+    const btnMoreConvs = byId("btnMoreConvs");
+    btnMoreConvs?.addEventListener("click", async () => {
+        btnMoreConvs.disabled = true;
+        try {
+            const params = new URLSearchParams({
+                q: btnMoreConvs.getAttribute("data-q") || "",
+                cursor: btnMoreConvs.getAttribute("data-cursor") || ""
+            });
+            const res = await fetch(`/ai/conversations?${params}`);
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            const data = await res.json();
+            for (const conv of data.items) {
+                const a = document.createElement("a");
+                a.className = "btn btn-outline-secondary btn-sm text-start rounded-pill d-flex justify-content-between align-items-center";
+                a.href = `/ai?chat_id=${encodeURIComponent(conv.id)}`;
+                a.setAttribute("aria-label", `Open chat ${conv.title}`);
+                a.innerHTML = `<span class="text-truncate">${escapeHtml(conv.title)}</span><i class="bi bi-chevron-right small"></i>`;
+                convList.appendChild(a);
+            }
+            if (data.next_cursor) {
+                btnMoreConvs.setAttribute("data-cursor", data.next_cursor);
+            } else {
+                btnMoreConvs.remove();
+            }
+        } catch (err) {
+            console.error(err);
+        } finally {
+            btnMoreConvs.disabled = false;
+        }
+    });
 })();
@@ -0,0 +1,39 @@
+(function () {
+    const byId = (id) => document.getElementById(id);
+
+    function escapeHtml(s) {
+        return String(s ?? "").replace(/[&<>"]/g, (c) => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;" }[c]));
+    }
+
+    // Issue modal: fetch further pages of comments on demand
+    const commentsList = byId("commentsList");
+    const btnMoreComments = byId("btnMoreComments");
+    btnMoreComments?.addEventListener("click", async () => {
+        btnMoreComments.disabled = true;
+        try {
+            const issueId = btnMoreComments.getAttribute("data-issue-id");
+            const params = new URLSearchParams({
+                cursor: btnMoreComments.getAttribute("data-cursor") || ""
+            });
+            const res = await fetch(`/forum/api/issues/${issueId}/comments?${params}`);
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            const data = await res.json();
+            for (const comment of data.items) {
+                const div = document.createElement("div");
+                div.className = "p-2 rounded-3 bg-light shadow-sm";
+                div.innerHTML = `<span class="fw-bold">${escapeHtml(comment.author_name || comment.author_id)}</span>
+            <p class="mb-0 small">${escapeHtml(comment.body)}</p>`;
+                commentsList.appendChild(div);
+            }
+            if (data.next_cursor) {
+                btnMoreComments.setAttribute("data-cursor", data.next_cursor);
+            } else {
+                btnMoreComments.parentElement.remove();
+            }
+        } catch (err) {
+            console.error(err);
+        } finally {
+            btnMoreComments.disabled = false;
+        }
+    });
+})();
@@ -0,0 +1,213 @@
+"""
+Concurrent read/write throughput of the Dev (NullPool, rollback journal)
+and Prod (pooled, WAL) database configurations on an SQLite file.
+
+Then checks the vote buffer across processes: two worker processes cast
+the same votes before either flushes. Both accept them (409 only covers
+one process's pending votes), yet the stored vote rows and counters must
+count each vote once, and after the flush every repeat must get a 409.
+Exits non-zero if not.
+
+    python -m benchmarks.bench_db_concurrency --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.config import DevConfig, ProdConfig
+from app.extensions import db
+from app.models.issue import Issue
+from app.models.user import User
+from app.models.vote import IssueVote
+from app.blueprints.forum.vote_buffer import DuplicateVote, get_vote_buffer
+
+VOTE_PROCESSES = 2
+VOTERS = 10
+VOTED_ISSUES = 20
+
+
+def seed(n_issues: int):
+    db.session.add(User(account="bench", password_hash="x", name="bench", display_name="bench"))
+    db.session.commit()
+    db.session.execute(
+        Issue.__table__.insert(),
+        [{"author_id": "bench", "title": f"issue {k}", "body": "b" * 200, "upvote": 0} for k in range(n_issues)],
+    )
+    db.session.commit()
+
+
+def worker(app, kind, n_issues, deadline, counts, lock):
+    rng = random.Random()
+    done = errors = 0
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            issue_id = rng.randint(1, n_issues)
+            try:
+                if kind == "read":
+                    db.session.execute(
+                        text("SELECT id, title, upvote FROM issues WHERE id <= :id ORDER BY id DESC LIMIT 20"),
+                        {"id": issue_id},
+                    ).all()
+                    db.session.rollback()
+                else:
+                    db.session.execute(
+                        text("UPDATE issues SET upvote = upvote + 1 WHERE id = :id"), {"id": issue_id}
+                    )
+                    db.session.commit()
+                done += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+            finally:
+                db.session.remove()
+    with lock:
+        counts[kind] += done
+        counts["errors"] += errors
+
+
+def run(config_cls, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(config_cls):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            SECRET_KEY = "bench-db-concurrency"
+            if config_cls is ProdConfig:
+                SQLALCHEMY_ENGINE_OPTIONS = {"pool_size": args.readers + args.writers, "max_overflow": 0}
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            seed(args.issues)
+            mode = db.session.execute(text("PRAGMA journal_mode")).scalar()
+
+        counts = {"read": 0, "write": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=worker, args=(app, kind, args.issues, deadline, counts, lock))
+            for kind in ["read"] * args.readers + ["write"] * args.writers
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with app.app_context():
+            db.engine.dispose()
+
+    name = f"{config_cls.__name__} ({mode})"
+    print(
+        f"{name:<22}{counts['read'] / args.seconds:>12.0f}{counts['write'] / args.seconds:>12.0f}"
+        f"{counts['errors']:>10}"
+    )
+
+
+def _vote_config(db_path):
+    class VoteConfig(ProdConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SECRET_KEY = "bench-db-concurrency"
+        VOTE_BUFFER_ENABLED = True
+        VOTE_BUFFER_DURABILITY = "memory"
+        VOTE_BUFFER_FLUSH_INTERVAL = 3600  # flushed explicitly below
+    return VoteConfig
+
+
+def _cast_all(buffer):
+    accepted = rejected = 0
+    for k in range(VOTERS):
+        for issue_id in range(1, VOTED_ISSUES + 1):
+            try:
+                buffer.cast("issue", f"voter{k}", issue_id)
+                accepted += 1
+            except DuplicateVote:
+                rejected += 1
+    return accepted, rejected
+
+
+def vote_process(db_path, barrier, results):
+    app = create_app(_vote_config(db_path))
+    with app.app_context():
+        buffer = get_vote_buffer()
+        barrier.wait()
+        first = _cast_all(buffer)
+        barrier.wait()   # every process has cast before any flushes
+        buffer.flush()
+        barrier.wait()
+        repeat = _cast_all(buffer)
+    results.put((first, repeat))
+
+
+def duplicate_votes() -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "votes.db"
+        app = create_app(_vote_config(db_path))
+        with app.app_context():
+            db.create_all()
+            seed(VOTED_ISSUES)
+            db.session.add_all(
+                User(account=f"voter{k}", password_hash="x", name=f"voter {k}", display_name=f"v{k}")
+                for k in range(VOTERS)
+            )
+            db.session.commit()
+
+        ctx = multiprocessing.get_context("spawn")
+        barrier = ctx.Barrier(VOTE_PROCESSES)
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=vote_process, args=(str(db_path), barrier, results))
+            for _ in range(VOTE_PROCESSES)
+        ]
+        for p in procs:
+            p.start()
+        outcomes = [results.get(timeout=120) for _ in procs]
+        for p in procs:
+            p.join()
+
+        with app.app_context():
+            rows = db.session.execute(select(func.count()).select_from(IssueVote)).scalar()
+            upvotes = db.session.execute(select(func.sum(Issue.upvote))).scalar()
+            received = db.session.execute(
+                select(User.upvotes_received).where(User.account == "bench")
+            ).scalar()
+            db.engine.dispose()
+
+    distinct = VOTERS * VOTED_ISSUES
+    accepted = sum(first[0] for first, _ in outcomes)
+    repeat_accepted = sum(repeat[0] for _, repeat in outcomes)
+    print(
+        f"\n{distinct} votes cast through each of {VOTE_PROCESSES} processes before a flush: "
+        f"{accepted} accepted, {VOTE_PROCESSES * distinct - accepted} rejected"
+    )
+    print(f"stored: {rows} vote rows, upvote total {upvotes}, author received {received}")
+    print(f"after the flush: {repeat_accepted} of {VOTE_PROCESSES * distinct} repeats accepted")
+    ok = rows == upvotes == received == distinct and repeat_accepted == 0
+    print("ok   each vote stored and counted once" if ok else "FAIL duplicate votes miscounted")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--issues", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s")
+    print(f"{'config':<22}{'reads/s':>12}{'writes/s':>12}{'errors':>10}")
+    for config_cls in (DevConfig, ProdConfig):
+        run(config_cls, args)
+
+    sys.exit(0 if duplicate_votes() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Load test for the pooled, rate-limited LLM client against the local fake
+endpoint: many concurrent callers, optional upstream 429s, and a report of
+latency, rejections, retries and peak saturation.
+
+    python -m benchmarks.bench_llm_client --clients 64 --requests 400 --error-rate 0.1
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAIError
+
+from app.blueprints.chatbot.client import LLMBusy, LLMClient, LLMRateLimited
+from benchmarks.fake_llm import start_fake_llm
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=2.0)
+    parser.add_argument("--global-rate", type=float, default=200.0)
+    parser.add_argument("--user-rate", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake upstream first-token delay")
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_llm(first_token_delay=args.latency, error_rate=args.error_rate)
+    client = LLMClient(
+        api_key="fake", base_url=base_url,
+        max_connections=args.concurrency, max_concurrency=args.concurrency,
+        queue_timeout=args.queue_timeout, max_retries=3, backoff_base=0.05, backoff_max=1.0,
+        global_rate=args.global_rate, global_burst=args.global_rate * 2,
+        user_rate=args.user_rate, user_burst=args.user_rate * 2,
+    )
+
+    outcomes = {"ok": 0, "rate_limited": 0, "busy": 0, "error": 0}
+    latencies = []
+    lock = threading.Lock()
+    peak = {"in_flight": 0, "waiting": 0}
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.01):
+            m = client.metrics()
+            peak["in_flight"] = max(peak["in_flight"], m["in_flight"])
+            peak["waiting"] = max(peak["waiting"], m["waiting"])
+
+    def call(i):
+        params = {"model": "fake", "messages": [{"role": "user", "content": f"q{i}"}], "max_tokens": 50}
+        start = time.perf_counter()
+        try:
+            client.admit(f"user{i % args.users}")
+            if args.stream:
+                for _ in client.stream(**params):
+                    pass
+            else:
+                client.create(**params)
+            outcome = "ok"
+        except LLMRateLimited:
+            outcome = "rate_limited"
+        except LLMBusy:
+            outcome = "busy"
+        except OpenAIError:
+            outcome = "error"
+        elapsed = time.perf_counter() - start
+        with lock:
+            outcomes[outcome] += 1
+            if outcome == "ok":
+                latencies.append(elapsed)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        list(pool.map(call, range(args.requests)))
+    wall = time.perf_counter() - start
+    done.set()
+    server.shutdown()
+
+    print(f"{args.requests} requests, {args.clients} clients, concurrency {args.concurrency}, "
+          f"{'stream' if args.stream else 'create'}, upstream error rate {args.error_rate:.0%}")
+    print(f"  wall {wall:.2f}s  throughput {outcomes['ok'] / wall:.1f} ok/s")
+    print("  outcomes " + "  ".join(f"{k}={v}" for k, v in outcomes.items()))
+    if latencies:
+        print(f"  latency p50 {percentile(latencies, 0.50) * 1000:.0f}ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:.0f}ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms  "
+              f"mean {statistics.mean(latencies) * 1000:.0f}ms")
+    m = client.metrics()
+    print(f"  upstream calls {m['requests']}  retries {m['retries']}  "
+          f"peak in flight {peak['in_flight']}/{args.concurrency}  peak waiting {peak['waiting']}")
+
+
+if __name__ == "__main__":
+    main()
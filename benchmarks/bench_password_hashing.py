@@ -0,0 +1,61 @@
+"""
+Login (password verify) throughput per core for several hash work factors,
+inline and through the HashingService process pool.
+
+    python -m benchmarks.bench_password_hashing --seconds 3 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.passwords import HashingService, WerkzeugHasher
+
+METHODS = [
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+]
+
+
+def measure(service, password_hash, seconds, clients):
+    deadline = time.perf_counter() + seconds
+
+    def client(_):
+        n = 0
+        while time.perf_counter() < deadline:
+            service.verify(password_hash, "correct-horse")
+            n += 1
+        return n
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        total = sum(pool.map(client, range(clients)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    cores = min(args.workers, os.cpu_count() or 1)
+    print(f"{os.cpu_count()} cpus, pool of {args.workers} workers, {args.seconds:g}s per run")
+    print(f"{'method':<24}{'inline/s':>10}{'pool/s':>10}{'per core':>10}")
+    for method in METHODS:
+        hasher = WerkzeugHasher(method)
+        password_hash = hasher.hash("correct-horse")
+
+        inline = measure(HashingService(hasher, workers=0), password_hash, args.seconds, 1)
+        service = HashingService(hasher, workers=args.workers, max_queue=args.workers * 4)
+        service.verify(password_hash, "warm-up")
+        pooled = measure(service, password_hash, args.seconds, args.workers * 2)
+        service._executor().shutdown()
+
+        print(f"{method:<24}{inline:>10.1f}{pooled:>10.1f}{pooled / cores:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares forum search through the FTS5 index against the LIKE title scan.
+
+    python -m benchmarks.bench_search --issues 200000 --runs 20
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app import create_app
+from app.config import DevConfig
+from app.extensions import db
+from app.models.issue import Issue
+from app.models.user import User
+from app.blueprints.forum.search import text_filter
+
+WORDS = [
+    "midterm", "final", "exam", "homework", "calculus", "physics", "lab",
+    "schedule", "password", "reset", "library", "deadline", "project",
+    "期中考", "作業", "圖書館", "課程", "成績", "報告", "實驗室",
+]
+QUERIES = ["midterm", "password reset", "圖書館", "calculus deadline", "laboratory"]
+
+
+def vocabulary(rng, size=20000):
+    # Real posts draw from a large vocabulary; keep the topic words rare-ish.
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    filler = ["".join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(size)]
+    return filler + WORDS
+
+
+def seed(n_issues: int):
+    db.session.add(User(account="bench", password_hash="x", name="bench", display_name="bench"))
+    db.session.commit()
+
+    rng = random.Random(42)
+    vocab = vocabulary(rng)
+    rows = [
+        {
+            "author_id": "bench",
+            "title": " ".join(rng.choices(vocab, k=6)),
+            "body": " ".join(rng.choices(vocab, k=40)),
+            "upvote": 0,
+        }
+        for _ in range(n_issues)
+    ]
+    db.session.execute(Issue.__table__.insert(), rows)
+    db.session.commit()
+
+
+def timed(app, backend: str, qstr: str, runs: int, sort: str):
+    app.config["FORUM_SEARCH_BACKEND"] = backend
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        q, rank = text_filter(Issue.query, qstr, rank=(sort == "relevance"))
+        q = q.order_by(rank, Issue.id.desc()) if rank is not None else q.order_by(Issue.id.desc())
+        q.paginate(page=1, per_page=20, error_out=False)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--issues", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(DevConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{Path(tmp) / 'bench.db'}"
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            seed(args.issues)
+
+            print(f"{args.issues} issues, best of {args.runs} runs (page 1 + COUNT)")
+            print(f"{'query':<22}{'like':>10}{'fts':>10}{'fts+bm25':>12}")
+            for qstr in QUERIES:
+                like = timed(app, "like", qstr, args.runs, "newest")
+                fts = timed(app, "fts", qstr, args.runs, "newest")
+                bm25 = timed(app, "fts", qstr, args.runs, "relevance")
+                print(f"{qstr:<22}{like * 1000:>8.1f}ms{fts * 1000:>8.1f}ms{bm25 * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
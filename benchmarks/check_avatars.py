@@ -0,0 +1,145 @@
+"""
+Checks the background avatar validation (app/blueprints/utils/avatars.py)
+against local http.server stand-ins: an image is accepted, a non-image
+and a 404 are rejected, a slow host times out without holding up the
+profile form, rejections are answered from the URL and host caches, and
+a stale validation never overwrites a newer pending URL. Exits non-zero
+on any failure.
+
+    python -m benchmarks.check_avatars      # or all checks: python -m benchmarks.checks
+"""
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.user import User
+from benchmarks.harness import add_user, login, main, make_app
+
+TIMEOUT = 1.0   # AVATAR_VALIDATION_TIMEOUT; the slow host answers after 3x this
+SETTLE = 10.0   # longest wait for a background validation
+LATE = {"/early": TIMEOUT / 4, "/late": TIMEOUT * 3 / 4}   # per-path delays on the good host
+
+
+def stand_in(delay: float = 0.0):
+    """A threaded server on a free port; returns (base url, per-path hit counter)."""
+    hits = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            hits[self.path] += 1
+            time.sleep(delay or LATE.get(self.path.split("-")[0], 0))
+            if self.path.endswith(".png"):
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+            elif self.path.endswith(".html"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+            else:
+                self.send_response(404)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", hits
+
+
+class Profile:
+    """A logged-in user posting the profile form, and that user's avatar columns."""
+
+    def __init__(self):
+        self.app = make_app(AVATAR_VALIDATION_TIMEOUT=TIMEOUT)
+        with self.app.app_context():
+            add_user("u0", "avatar")
+            db.session.commit()
+        self.client = login(self.app, "u0", "avatar")
+
+    def submit(self, url: str) -> float:
+        """Posts the profile form; returns how long the request took."""
+        started = time.perf_counter()
+        resp = self.client.post("/profile/update_information", data={"display_name": "u0", "avatar_url": url})
+        if resp.status_code != 302:
+            raise RuntimeError(f"profile form answered HTTP {resp.status_code}")
+        return time.perf_counter() - started
+
+    def state(self):
+        with self.app.app_context():
+            return db.session.execute(
+                select(User.avatar_url, User.pending_avatar_url).where(User.account == "u0")
+            ).one()
+
+    def settled(self):
+        """(avatar_url, pending_avatar_url) once nothing is pending, or the last state at the deadline."""
+        deadline = time.monotonic() + SETTLE
+        while True:
+            state = self.state()
+            if state.pending_avatar_url is None or time.monotonic() > deadline:
+                return state
+            time.sleep(0.05)
+
+
+def run(report):
+    good, hits = stand_in()
+    slow, slow_hits = stand_in(delay=TIMEOUT * 3)
+    p = Profile()
+    current = f"{good}/a.png"
+
+    p.submit(current)
+    state = p.settled()
+    report.check("image accepted", state.avatar_url == current, f"state {tuple(state)}")
+
+    for name, url in (("non-image rejected", f"{good}/page.html"), ("404 rejected", f"{good}/missing")):
+        p.submit(url)
+        state = p.settled()
+        report.check(name, tuple(state) == (current, None), f"state {tuple(state)}")
+
+    elapsed = p.submit(f"{slow}/b.png")
+    report.check("slow host does not block profile_post", elapsed < TIMEOUT / 2, f"request took {elapsed:.2f}s")
+    started = time.perf_counter()
+    state = p.settled()
+    waited = time.perf_counter() - started
+    report.check(
+        "slow host times out and is rejected", tuple(state) == (current, None) and waited < TIMEOUT * 2,
+        f"state {tuple(state)} after {waited:.2f}s",
+    )
+
+    before = hits["/page.html"]
+    p.submit(f"{good}/page.html")
+    state = p.state()
+    report.check(
+        "negative cache hit", hits["/page.html"] == before and tuple(state) == (current, None),
+        f"{hits['/page.html'] - before} new requests, state {tuple(state)}",
+    )
+
+    before = sum(slow_hits.values())
+    p.submit(f"{slow}/other.png")
+    state = p.state()
+    report.check(
+        "host cache hit", sum(slow_hits.values()) == before and tuple(state) == (current, None),
+        f"{sum(slow_hits.values()) - before} new requests, state {tuple(state)}",
+    )
+
+    # the first URL validates while the second is still in flight, and must not settle the user
+    p.submit(f"{good}/early-first.png")
+    p.submit(f"{good}/late-second.png")
+    time.sleep(TIMEOUT / 2)
+    mid = p.state()
+    state = p.settled()
+    report.check(
+        "newer pending URL is not overwritten",
+        hits["/early-first.png"] == 1
+        and tuple(mid) == (current, f"{good}/late-second.png")
+        and state.avatar_url == f"{good}/late-second.png",
+        f"after the first validation {tuple(mid)}, settled {tuple(state)}",
+    )
+
+
+if __name__ == "__main__":
+    main(run)
@@ -0,0 +1,48 @@
+"""
+Checks forum search results for queries mixing terms the FTS trigram index
+can match (three or more characters) with shorter ones, which it can't:
+every short term must still appear in the issues returned. Exits non-zero
+on any failure.
+
+    python -m benchmarks.check_search       # or all checks: python -m benchmarks.checks
+"""
+from app.extensions import db
+from app.models.issue import Issue
+from benchmarks.harness import add_user, login, main, make_app
+
+ISSUES = [
+    "midterm calculus question",
+    "ab testing before the midterm",
+    "physics lab report",
+    "c# homework help",
+]
+# query -> titles expected, in id order
+CASES = {
+    "midterm": [ISSUES[0], ISSUES[1]],
+    "ab midterm": [ISSUES[1]],
+    "AB MIDTERM": [ISSUES[1]],
+    "ab zz midterm": [],
+    "c# homework": [ISSUES[3]],
+    "lab physics": [ISSUES[2]],
+}
+
+
+def run(report):
+    app = make_app(FORUM_SEARCH_BACKEND="fts")
+    with app.app_context():
+        add_user("u0", "search")
+        db.session.add_all(Issue(author_id="u0", title=title, body=title) for title in ISSUES)
+        db.session.commit()
+
+    client = login(app, "u0", "search")
+    for qstr, expected in CASES.items():
+        resp = client.get("/forum/api/search", query_string={"q": qstr, "per_page": 50})
+        titles = sorted((item["title"] for item in resp.get_json()["items"]), key=ISSUES.index)
+        report.check(
+            f"{qstr!r}: {len(expected)} issues", resp.status_code == 200 and titles == expected,
+            f"HTTP {resp.status_code}, got {titles}",
+        )
+
+
+if __name__ == "__main__":
+    main(run)
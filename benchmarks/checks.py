@@ -0,0 +1,14 @@
+"""
+Runs every behavioural check (see benchmarks/harness.py) and exits
+non-zero if any of them fails:
+
+    python -m benchmarks.checks
+"""
+from benchmarks import check_avatars, check_search, query_budgets
+from benchmarks.harness import main
+
+CHECKS = [query_budgets.run, check_search.run, check_avatars.run]
+
+
+if __name__ == "__main__":
+    main(*CHECKS)
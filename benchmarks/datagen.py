@@ -0,0 +1,147 @@
+"""
+Synthetic data for the load benchmarks: users, admins, labelled issues and
+comments, written with executemany inserts in chunks. Deterministic for a
+given --seed.
+
+    python -m benchmarks.datagen --out /tmp/bench.db --users 5000 --issues 50000 --comments 200000
+
+Every user's password is PASSWORD (hashed once, with the configured hasher).
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from app import create_app
+from app.config import DevConfig
+from app.extensions import db
+from app.models.admin import Admin
+from app.models.comment import Comment
+from app.models.issue import Issue
+from app.models.label import Label, issue_labels
+from app.models.user import User
+
+PASSWORD = "bench-pass"
+CHUNK = 5000
+
+WORDS = [
+    "midterm", "final", "exam", "homework", "calculus", "physics", "lab",
+    "schedule", "password", "reset", "library", "deadline", "project",
+    "期中考", "作業", "圖書館", "課程", "成績", "報告", "實驗室",
+]
+LABELS = ["exam", "homework", "course", "campus", "library", "account", "math", "physics", "club", "other"]
+
+
+def account(k: int) -> str:
+    return f"s{k:06d}"
+
+
+def _chunks(rows, size=CHUNK):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(table, rows):
+    for batch in _chunks(rows):
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+
+def generate(users=1000, admins=5, issues=5000, comments=20000, seed=42):
+    """Fills the (empty, created) database of the current app context; returns row counts."""
+    rng = random.Random(seed)
+    vocab = WORDS + ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 9))) for _ in range(2000)]
+
+    probe = User(account="probe")
+    probe.set_password(PASSWORD)
+    password_hash = probe.password_hash
+
+    _insert(User.__table__, (
+        {
+            "account": account(k), "password_hash": password_hash,
+            "name": f"student {k}", "display_name": f"s{k}",
+        }
+        for k in range(users)
+    ))
+    _insert(Admin.__table__, ({"account": account(k)} for k in range(min(admins, users))))
+
+    _insert(Label.__table__, ({"id": i + 1, "name": name} for i, name in enumerate(LABELS)))
+
+    # comments cluster on a few popular issues, as in the real forum
+    weights = [rng.paretovariate(1.2) for _ in range(issues)]
+    comment_issue = rng.choices(range(1, issues + 1), weights=weights, k=comments)
+    comment_count = [0] * (issues + 1)
+    for issue_id in comment_issue:
+        comment_count[issue_id] += 1
+
+    issue_label_ids = [rng.sample(range(1, len(LABELS) + 1), rng.randint(1, 3)) for _ in range(issues)]
+    _insert(Issue.__table__, (
+        {
+            "id": i + 1,
+            "author_id": account(rng.randrange(users)),
+            "title": " ".join(rng.choices(vocab, k=6)),
+            "body": " ".join(rng.choices(vocab, k=40)),
+            "upvote": int(weights[i] * 3) - 3,
+            "comment_count": comment_count[i + 1],
+            "label": LABELS[issue_label_ids[i][0] - 1],
+        }
+        for i in range(issues)
+    ))
+    _insert(issue_labels, (
+        {"issue_id": i + 1, "label_id": label_id}
+        for i, label_ids in enumerate(issue_label_ids) for label_id in label_ids
+    ))
+    for label_id in range(1, len(LABELS) + 1):
+        db.session.execute(
+            Label.__table__.update().where(Label.id == label_id).values(
+                issue_count=sum(label_id in ids for ids in issue_label_ids)
+            )
+        )
+    db.session.commit()
+
+    _insert(Comment.__table__, (
+        {
+            "author_id": account(rng.randrange(users)),
+            "issue_id": issue_id,
+            "body": " ".join(rng.choices(vocab, k=15)),
+            "upvote": rng.randint(0, 5),
+        }
+        for issue_id in comment_issue
+    ))
+    return {"users": users, "admins": min(admins, users), "issues": issues, "comments": comments}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", required=True, help="SQLite file to create")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--issues", type=int, default=5000)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    out = Path(args.out).resolve()
+    if out.exists():
+        parser.error(f"{out} already exists")
+
+    class GenConfig(DevConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{out}"
+
+    app = create_app(GenConfig)
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        counts = generate(args.users, args.admins, args.issues, args.comments, args.seed)
+    elapsed = time.perf_counter() - start
+    print(", ".join(f"{n} {k}" for k, n in counts.items()) + f" in {elapsed:.1f}s -> {out}")
+
+
+if __name__ == "__main__":
+    main()
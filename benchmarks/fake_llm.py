@@ -0,0 +1,136 @@
+"""
+Local stand-in for an OpenAI-compatible /chat/completions endpoint, for
+exercising the chatbot without upstream credentials.
+
+    python -m benchmarks.fake_llm --port 8765 --token-delay 0.02
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 LLM_API_KEY=fake flask run
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Sure! The midterm schedule is posted on the course page under Announcements."
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.0
+    first_token_delay = 0.0
+    reply = REPLY
+    error_rate = 0.0
+    requests_served = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        type(self).requests_served += 1
+
+        if self.error_rate and random.random() < self.error_rate:
+            payload = b'{"error": {"message": "rate limited", "type": "rate_limit_error"}}'
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        tokens = [w + " " for w in self.reply.split()]
+        usage = {
+            "prompt_tokens": sum(len(m.get("content", "").split()) for m in body.get("messages", [])),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        time.sleep(self.first_token_delay)
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for tok in tokens:
+                time.sleep(self.token_delay)
+                self._chunk(self._event({"delta": {"content": tok}, "index": 0, "finish_reason": None}))
+            self._chunk(self._event({"delta": {}, "index": 0, "finish_reason": "stop"}))
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+            return
+
+        time.sleep(self.token_delay * len(tokens))
+        payload = json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+            "prompt_echo": prompt,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _event(self, choice):
+        data = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "fake",
+            "choices": [choice],
+        }
+        return f"data: {json.dumps(data)}\n\n".encode()
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_fake_llm(port=0, token_delay=0.0, first_token_delay=0.0, reply=REPLY, error_rate=0.0):
+    """
+    Starts the server on a daemon thread; returns (server, base_url).
+    `error_rate` is the fraction of requests answered with a 429.
+    """
+    handler = type("Handler", (FakeLLMHandler,), {
+        "token_delay": token_delay,
+        "first_token_delay": first_token_delay,
+        "reply": reply,
+        "error_rate": error_rate,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_llm(
+        args.port, args.token_delay, args.first_token_delay, error_rate=args.error_rate,
+    )
+    print(f"fake LLM listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Shared harness for the behavioural checks (query budgets, search results,
+avatar validation). Each check module defines run(report) and can run on
+its own with `python -m benchmarks.<module>`; all of them run with
+
+    python -m benchmarks.checks
+
+Either way the process exits non-zero if any check failed, or crashed.
+"""
+import sys
+import traceback
+
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+
+
+class CheckConfig:
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    SECRET_KEY = "checks"
+    SESSION_COOKIE_SECURE = False
+    TESTING = True
+    QUERY_BUDGET_STRICT = True
+
+
+def make_app(**config):
+    """An app on a fresh in-memory database; `config` overrides CheckConfig."""
+    app = create_app(type("Config", (CheckConfig,), config))
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def add_user(account: str, password: str = None) -> User:
+    """Adds (not commits) a user; only users with a password can log in. Needs an app context."""
+    user = User(account=account, name=f"user {account}", display_name=account)
+    if password is None:
+        user.password_hash = "x"
+    else:
+        user.set_password(password)
+    db.session.add(user)
+    return user
+
+
+def login(app, account: str, password: str):
+    client = app.test_client()
+    resp = client.post("/login", data={"account": account, "password": password})
+    if resp.status_code != 302:
+        raise RuntimeError(f"login as {account} failed: HTTP {resp.status_code}")
+    return client
+
+
+class Report:
+    def __init__(self):
+        self.failures = 0
+
+    def section(self, title: str):
+        print(f"\n{title}")
+
+    def check(self, name: str, ok: bool, detail: str = ""):
+        if ok:
+            print(f"ok   {name}")
+        else:
+            print(f"FAIL {name}: {detail}")
+            self.failures += 1
+
+
+def main(*runs):
+    report = Report()
+    for run in runs:
+        report.section(run.__module__)
+        try:
+            run(report)
+        except Exception:
+            report.check("completes", False, traceback.format_exc())
+    print(f"\n{report.failures} failure(s)" if report.failures else "\nall checks passed")
+    sys.exit(1 if report.failures else 0)
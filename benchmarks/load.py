@@ -0,0 +1,378 @@
+"""
+Load test of the real app: virtual users log in and then loop through the
+forum list / search / detail / upvote, profile and chatbot flows against a
+synthetic database (benchmarks/datagen.py) and the fake LLM server.
+Reports throughput and p50/p95/p99 latency per route.
+
+    python -m benchmarks.load                                   # Flask test client, in process
+    python -m benchmarks.load --target gunicorn --workers 4     # gunicorn.conf.py on a local port
+    python -m benchmarks.load --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load --baseline benchmarks/baseline.json --tolerance 0.2
+
+With --baseline the run exits non-zero if any route's p95 grew, or its
+throughput fell, by more than --tolerance. Baselines only compare
+meaningfully on the same machine and with the same options;
+benchmarks/baseline.json is a reference run with the default options
+(1 CPU), to re-record on the machine that compares against it. Short
+runs are noisy on fast routes, so prefer --seconds 60 for real gates.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from app import create_app
+from app.config import ProdConfig, _engine_options
+from app.extensions import db
+from benchmarks.datagen import PASSWORD, WORDS, account, generate
+from benchmarks.fake_llm import start_fake_llm
+
+ROOT = Path(__file__).resolve().parent.parent
+
+QUESTIONS = [
+    "When is the calculus midterm?", "How do I reset my password?", "Where is the physics lab?",
+    "What are the library opening hours?", "How is the final grade computed?",
+    "Can I submit homework late?", "Who do I ask about course registration?",
+]
+
+# (flow, weight) per loop iteration; login also runs once per virtual user up front
+FLOWS = [
+    ("forum_list", 30),
+    ("forum_search", 15),
+    ("issue_detail", 25),
+    ("issue_upvote", 10),
+    ("profile", 10),
+    ("chat", 5),
+    ("login", 5),
+]
+
+
+class LoadConfig(ProdConfig):
+    # read from the environment so gunicorn workers (APP_CONFIG=benchmarks.load.LoadConfig) see them
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URI", "sqlite://")
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    SECRET_KEY = "load-benchmark"          # shared by all workers, or sessions break
+    SESSION_COOKIE_SECURE = False          # plain http on localhost
+    LLM_API_KEY = "fake"
+    # the benchmark measures the server, not the per-user throttles
+    LLM_USER_RATE = LLM_GLOBAL_RATE = 1e6
+    LLM_USER_BURST = LLM_GLOBAL_BURST = 1e6
+
+
+# ---------- transports ----------
+class ClientTransport:
+    """In-process Flask test client; one per virtual user (keeps its own cookies)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json=None):
+        resp = self.client.open(path, method=method, data=data, json=json)
+        return resp.status_code, resp.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.client = httpx.Client(base_url=base_url, timeout=30.0)
+
+    def request(self, method, path, data=None, json=None):
+        resp = self.client.request(method, path, data=data, json=json)
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        return resp.status_code, body
+
+    def close(self):
+        self.client.close()
+
+
+# ---------- virtual users ----------
+class VirtualUser:
+    def __init__(self, transport, rng, n_users, n_issues):
+        self.t = transport
+        self.rng = rng
+        self.account = account(rng.randrange(n_users))
+        self.n_issues = n_issues
+        self.chat_id = None
+        self.logged_in = False
+
+    def issue_id(self):
+        # skewed towards recent issues, like the list pages people click through
+        return max(1, self.n_issues - int(self.rng.expovariate(1 / 200)))
+
+    def login(self):
+        status, _ = self.t.request("POST", "/login", data={"account": self.account, "password": PASSWORD})
+        self.logged_in = status == 302
+        return status
+
+    def forum_list(self):
+        return self.t.request("GET", f"/forum/api/issues?per_page=20&label={self.rng.choice(['', 'exam', 'homework'])}")[0]
+
+    def forum_search(self):
+        q = " ".join(self.rng.sample(WORDS, self.rng.randint(1, 2)))
+        return self.t.request("GET", f"/forum/api/search?q={q}&per_page=20")[0]
+
+    def issue_detail(self):
+        return self.t.request("GET", f"/forum/api/issues/{self.issue_id()}")[0]
+
+    def issue_upvote(self):
+        return self.t.request("POST", f"/forum/api/issues/{self.issue_id()}/upvote")[0]
+
+    def profile(self):
+        return self.t.request("GET", "/profile")[0]
+
+    def chat(self):
+        status, body = self.t.request("POST", "/ai/send", json={
+            "message": self.rng.choice(QUESTIONS), "temperature": 0.5, "chat_id": self.chat_id,
+        })
+        if status == 200 and body:
+            self.chat_id = body.get("chat_id")
+        return status
+
+
+# run options stored with a baseline; comparing across different ones is flagged
+BASELINE_OPTIONS = ("target", "vus", "seconds", "users", "issues", "comments", "workers", "threads")
+
+# 409 = already voted: an expected outcome, not an error. Any redirect is an
+# error (a lost session or failed auth sends the user to /login), except
+# the one a successful login answers with.
+OK_STATUSES = {200, 304, 409}
+FLOW_OK_STATUSES = {"login": {302}}
+
+
+def run_user(transport, seed, args, deadline, results, lock):
+    rng = random.Random(seed)
+    user = VirtualUser(transport, rng, args.users, args.issues)
+    names = [name for name, _ in FLOWS]
+    weights = [w for _, w in FLOWS]
+    local = {}
+
+    def timed(name):
+        start = time.perf_counter()
+        try:
+            ok = getattr(user, name)() in FLOW_OK_STATUSES.get(name, OK_STATUSES)
+        except httpx.HTTPError:
+            ok = False
+        latency = time.perf_counter() - start
+        samples, errors = local.setdefault(name, ([], [0]))
+        samples.append(latency)
+        errors[0] += not ok
+
+    timed("login")
+    while time.perf_counter() < deadline:
+        if user.logged_in:
+            timed(rng.choices(names, weights)[0])
+        else:
+            # a rejected login (e.g. 503 while the hashing pool is full) is retried after a pause
+            time.sleep(0.1)
+            timed("login")
+    transport.close()
+    with lock:
+        for name, (samples, errors) in local.items():
+            merged = results.setdefault(name, ([], [0]))
+            merged[0].extend(samples)
+            merged[1][0] += errors[0]
+
+
+# ---------- reporting ----------
+def percentile(sorted_values, p):
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def summarize(results, seconds):
+    report = {}
+    everything = []
+    total_errors = 0
+    for name, (samples, errors) in sorted(results.items()):
+        everything.extend(samples)
+        total_errors += errors[0]
+        report[name] = _stats(samples, errors[0], seconds)
+    report["ALL"] = _stats(everything, total_errors, seconds)
+    return report
+
+
+def _stats(samples, errors, seconds):
+    s = sorted(samples)
+    return {
+        "requests": len(s),
+        "errors": errors,
+        "rps": round(len(s) / seconds, 2),
+        "p50_ms": round(percentile(s, 50) * 1000, 2),
+        "p95_ms": round(percentile(s, 95) * 1000, 2),
+        "p99_ms": round(percentile(s, 99) * 1000, 2),
+    }
+
+
+def print_report(report):
+    print(f"{'route':<16}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in report.items():
+        print(
+            f"{name:<16}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.1f}"
+            f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+        )
+
+
+def compare(report, baseline, tolerance):
+    """Prints per-route deltas against `baseline`; returns the list of regressions."""
+    regressions = []
+    print(f"\nvs baseline (tolerance {tolerance:.0%})")
+    print(f"{'route':<16}{'p95 ms':>18}{'req/s':>18}")
+    for name, r in report.items():
+        b = baseline.get(name)
+        if b is None:
+            continue
+        slower = b["p95_ms"] and r["p95_ms"] > b["p95_ms"] * (1 + tolerance)
+        fewer = b["rps"] and r["rps"] < b["rps"] * (1 - tolerance)
+        flag = "  REGRESSION" if slower or fewer else ""
+        print(
+            f"{name:<16}{b['p95_ms']:>8.2f} -> {r['p95_ms']:<8.2f}{b['rps']:>8.1f} -> {r['rps']:<8.1f}{flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+# ---------- targets ----------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(db_uri, llm_url, workers, threads):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "APP_CONFIG": "benchmarks.load.LoadConfig",
+        "BENCH_DATABASE_URI": db_uri,
+        "LLM_BASE_URL": llm_url,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(threads),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited:\n" + proc.stderr.read().decode(errors="replace"))
+        try:
+            httpx.get(f"{base_url}/login", timeout=1.0)
+            return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start within 30s")
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(args.db).resolve() if args.db else Path(tmp) / "load.db"
+        db_uri = f"sqlite:///{db_path}"
+        _, llm_url = start_fake_llm(token_delay=args.llm_token_delay, first_token_delay=args.llm_first_token_delay)
+
+        config = type("Config", (LoadConfig,), {
+            "SQLALCHEMY_DATABASE_URI": db_uri,
+            "SQLALCHEMY_ENGINE_OPTIONS": _engine_options(db_uri),
+            "LLM_BASE_URL": llm_url,
+        })
+        app = create_app(config)
+        with app.app_context():
+            if not args.db:
+                start = time.perf_counter()
+                db.create_all()
+                generate(args.users, args.admins, args.issues, args.comments, args.seed)
+                print(f"seeded {args.users} users, {args.issues} issues, {args.comments} comments "
+                      f"in {time.perf_counter() - start:.1f}s")
+
+        proc = None
+        if args.target == "gunicorn":
+            with app.app_context():
+                db.engine.dispose()
+            proc, base_url = start_gunicorn(db_uri, llm_url, args.workers, args.threads)
+            make_transport = lambda: HttpTransport(base_url)   # noqa: E731
+        else:
+            make_transport = lambda: ClientTransport(app)      # noqa: E731
+
+        print(f"{args.target}: {args.vus} virtual users for {args.seconds:g}s")
+        results, lock = {}, threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        try:
+            threads = [
+                threading.Thread(target=run_user, args=(make_transport(), args.seed + i, args, deadline, results, lock))
+                for i in range(args.vus)
+            ]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+        return summarize(results, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["client", "gunicorn"], default="client")
+    parser.add_argument("--vus", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="reuse a database made by benchmarks.datagen (sizes must match)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--issues", type=int, default=5000)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0)
+    parser.add_argument("--llm-first-token-delay", type=float, default=0.05)
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--save-baseline", help="write this run's report as JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    options = {k: getattr(args, k) for k in BASELINE_OPTIONS}
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps({"options": options, "routes": report}, indent=2) + "\n")
+        print(f"\nbaseline written to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        differing = sorted(k for k in BASELINE_OPTIONS if baseline["options"].get(k) != options[k])
+        if differing:
+            print(f"\nwarning: baseline was recorded with different {', '.join(differing)}")
+        regressions = compare(report, baseline["routes"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} route(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Checks that forum endpoints stay within their SQL query budgets: fails if
+any endpoint issues more statements than its @query_budget allows, or if
+the count grows with page size.
+
+    python -m benchmarks.query_budgets      # or all checks: python -m benchmarks.checks
+"""
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.comment import Comment
+from app.models.issue import Issue
+from app.blueprints.forum.labels import attach_labels
+from app.blueprints.utils.queries import QueryBudgetExceeded
+from benchmarks.harness import add_user, login, main, make_app
+
+ENDPOINTS = [
+    "/forum/api/issues?per_page={n}",
+    "/forum/api/issues?per_page={n}&label=exam",
+    "/forum/api/issues?per_page={n}&cursor=",
+    "/forum/api/search?q=midterm&per_page={n}",
+    "/forum/api/search?q=midterm&sort=relevance&per_page={n}",
+    "/forum/api/search?labels=exam,math&label_mode=all&per_page={n}",
+    "/forum/api/issues/1",
+    "/forum/api/issues/1/comments?per_page={n}&sort=top",
+]
+
+
+def seed():
+    add_user("u0", "budget")
+    for k in range(1, 20):
+        add_user(f"u{k}")
+    db.session.flush()
+
+    for k in range(60):
+        issue = Issue(author_id=f"u{k % 20}", title=f"midterm question {k}", body="...", label="exam", comment_count=10)
+        db.session.add(issue)
+        db.session.flush()
+        attach_labels(issue.id, ["exam"] if k % 2 else ["exam", "math"])
+        db.session.add_all(
+            Comment(author_id=f"u{(k + c) % 20}", issue_id=issue.id, body="reply") for c in range(10)
+        )
+    db.session.commit()
+
+
+def run(report):
+    app = make_app()
+    with app.app_context():
+        seed()
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *a: statements.append(1))
+
+    client = login(app, "u0", "budget")
+
+    for path in ENDPOINTS:
+        name = path.format(n="N")
+        counts = []
+        for n in (5, 20, 50):
+            url = path.format(n=n)
+            statements.clear()
+            try:
+                resp = client.get(url)
+            except QueryBudgetExceeded as exc:
+                report.check(name, False, f"{url}: {exc}")
+                break
+            if resp.status_code != 200:
+                report.check(name, False, f"{url}: HTTP {resp.status_code}")
+                break
+            counts.append(len(statements))
+        else:
+            report.check(
+                f"{name}: {counts[0]} queries", len(set(counts)) == 1,
+                f"query count grows with page size {counts}",
+            )
+
+
+if __name__ == "__main__":
+    main(run)
@@ -0,0 +1,26 @@
+# gunicorn -c gunicorn.conf.py main:app
+#
+# /ai/stream holds its connection open for the whole completion. With the
+# default sync workers that pins one worker per chat; use an async worker so
+# a few processes can serve many concurrent streams:
+#
+#   pip install gevent
+#   GUNICORN_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py main:app
+#
+# gthread is the fallback when gevent isn't installed (one thread per stream).
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+# ProdConfig sizes each worker's password hashing pool from this too
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+# gthread: concurrent requests (and streams) per worker
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# gevent/eventlet: concurrent greenlets per worker
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# streams can legitimately stay open for a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+keepalive = 5
@@ -0,0 +1,54 @@
+"""full-text index for issues
+
+Revision ID: 2d7e1a9c4b61
+Revises: 4c1b08ece918
+Create Date: 2026-10-18 10:12:41.208315
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '2d7e1a9c4b61'
+down_revision = '4c1b08ece918'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE issues_fts USING fts5(
+            title, body, content='issues', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER issues_fts_ai AFTER INSERT ON issues BEGIN
+            INSERT INTO issues_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER issues_fts_ad AFTER DELETE ON issues BEGIN
+            INSERT INTO issues_fts(issues_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER issues_fts_au AFTER UPDATE OF title, body ON issues BEGIN
+            INSERT INTO issues_fts(issues_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO issues_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+    """)
+    # backfill existing rows
+    op.execute("INSERT INTO issues_fts(issues_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS issues_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS issues_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS issues_fts_ai")
+    op.execute("DROP TABLE IF EXISTS issues_fts")
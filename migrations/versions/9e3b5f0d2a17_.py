@@ -0,0 +1,65 @@
+"""atomic upvotes: per-user vote tables and upvotes_received
+
+Revision ID: 9e3b5f0d2a17
+Revises: 2d7e1a9c4b61
+Create Date: 2026-10-18 11:02:57.334190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3b5f0d2a17'
+down_revision = '2d7e1a9c4b61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('issue_votes',
+    sa.Column('user_account', sa.String(length=16), nullable=False),
+    sa.Column('issue_id', sa.Integer(), nullable=False),
+    sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_account'], ['users.account'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_account', 'issue_id')
+    )
+    with op.batch_alter_table('issue_votes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_issue_votes_issue_id'), ['issue_id'], unique=False)
+
+    op.create_table('comment_votes',
+    sa.Column('user_account', sa.String(length=16), nullable=False),
+    sa.Column('comment_id', sa.Integer(), nullable=False),
+    sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_account'], ['users.account'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_account', 'comment_id')
+    )
+    with op.batch_alter_table('comment_votes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_comment_votes_comment_id'), ['comment_id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('upvotes_received', sa.Integer(), server_default='0', nullable=False))
+
+    # backfill from the upvotes already on issues and comments
+    op.execute("""
+        UPDATE users SET upvotes_received =
+            COALESCE((SELECT SUM(upvote) FROM issues WHERE issues.author_id = users.account), 0)
+          + COALESCE((SELECT SUM(upvote) FROM comments WHERE comments.author_id = users.account), 0)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('upvotes_received')
+
+    with op.batch_alter_table('comment_votes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_comment_votes_comment_id'))
+
+    op.drop_table('comment_votes')
+
+    with op.batch_alter_table('issue_votes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_issue_votes_issue_id'))
+
+    op.drop_table('issue_votes')
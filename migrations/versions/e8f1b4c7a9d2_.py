@@ -0,0 +1,54 @@
+"""full-text index for chatbot messages
+
+Revision ID: e8f1b4c7a9d2
+Revises: c3d9a6e2f4b8
+Create Date: 2026-10-18 15:40:17.552903
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f1b4c7a9d2'
+down_revision = 'c3d9a6e2f4b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE chat_messages_fts USING fts5(
+            content, content='chat_messages', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+            INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+            INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER chat_messages_fts_au AFTER UPDATE OF content ON chat_messages BEGIN
+            INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    # backfill existing rows
+    op.execute("INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS chat_messages_fts_ai")
+    op.execute("DROP TABLE IF EXISTS chat_messages_fts")